@@ -1,18 +1,35 @@
-from flask import Flask, jsonify
+from functools import partial
+from flask import Flask, Response, jsonify
 from .config import Config
-from .extensions import db, migrate, jwt, cors, ma, limiter
+from .extensions import db, migrate, jwt, cors, ma, limiter, cache, password_hasher, broker, metrics
+from .passwords import HasherBusy
+from .database import all_engines, engine_options, init_engines, pool_stats
+from .routing import init_replicas
+from .tiebreaks import parse_chain
 
 def create_app(config_class=None):
     app = Flask(__name__, static_folder=None)
     app.config.from_object(config_class or Config)
+    app.config["LEADERBOARD_TIEBREAKS"] = parse_chain(app.config.get("LEADERBOARD_TIEBREAKS"))
 
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
     db.init_app(app)
+    init_replicas(app, partial(engine_options, app.config))
+    init_engines(app)
     migrate.init_app(app, db)
     jwt.init_app(app)
     cors.init_app(app, resources={r"/api/*": {"origins": app.config["CORS_ORIGINS"]}},supports_credentials=True)
 
     ma.init_app(app)
     limiter.init_app(app)
+    cache.init_app(app)
+    password_hasher.init_app(app)
+    broker.init_app(app)
+    metrics.init_app(app, all_engines(app).values())
+    metrics.add_gauges("ttt_cache", cache.stats)
+    metrics.add_gauges("ttt_password_hasher", password_hasher.stats)
+    metrics.add_gauges("ttt_event_stream", broker.stats)
+    metrics.add_gauges("ttt_db_pool", lambda: pool_stats(app), label="engine")
 
     from .blueprints.users import users_bp
     from .blueprints.events import events_bp
@@ -22,9 +39,34 @@ def create_app(config_class=None):
     app.register_blueprint(events_bp, url_prefix="/api/events")
     app.register_blueprint(matches_bp, url_prefix="/api/matches")
 
+    from .commands import events_cli, ratings_cli, standings_cli, users_cli
+
+    app.cli.add_command(standings_cli)
+    app.cli.add_command(events_cli)
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(users_cli)
+
     @app.route("/health")
     def health():
-        return jsonify({"status": "ok"})
+        if not metrics.authorized():
+            return jsonify({"status": "ok"})
+        return jsonify({
+            "status": "ok",
+            "cache": cache.stats(),
+            "password_hasher": password_hasher.stats(),
+            "event_stream": broker.stats(),
+            "db_pool": pool_stats(app),
+        })
+
+    @app.route("/metrics")
+    def prometheus_metrics():
+        if not metrics.authorized():
+            return jsonify({"msg": "unauthorized"}), 401
+        return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+    @app.errorhandler(HasherBusy)
+    def hasher_busy(e):
+        return jsonify({"msg": "too many logins in progress, try again shortly"}), 503, {"Retry-After": "1"}
 
     @app.errorhandler(404)
     def not_found(e):
@@ -0,0 +1,192 @@
+"""Recreating an event from a JSON Lines export (see ``app.export``).
+
+The archive is read one line at a time. Consecutive records of the same
+type are collected into batches and written with executemany inserts,
+so memory use depends on the batch size and the number of users, not on
+the number of matches. Every id in the archive is remapped: the event
+and its matches get new ids, and users are matched by email. Emails that
+don't exist yet get a placeholder account (``PLACEHOLDER_PW``, which
+can't log in) that the owner of the email can claim with a token from
+``flask users claim-token`` (see app.claims).
+
+Standings are not copied. They are rebuilt from the imported match
+history, so they always agree with it.
+"""
+import json
+import time
+from datetime import date
+from sqlalchemy import insert
+from app.extensions import db
+from app.export import EXPORT_FORMAT, EXPORT_VERSION
+from app.models import PLACEHOLDER_PW, Event, EventPlayer, EventRole, MatchPlayer, User
+from app.scheduling import insert_matches
+from app import standings
+
+# records written per INSERT batch
+IMPORT_BATCH_SIZE = 1000
+
+
+class ArchiveError(ValueError):
+    """The archive is malformed or references something it never defined."""
+
+
+class _Importer:
+    def __init__(self, name=None):
+        self.name = name
+        self.event_id = None
+        self.user_map = {}
+        self.counts = {}
+
+    def _user(self, old_id, line_no):
+        try:
+            return self.user_map[old_id]
+        except KeyError:
+            raise ArchiveError(f"line {line_no}: unknown user_id {old_id}")
+
+    def _count(self, kind, n):
+        self.counts[kind] = self.counts.get(kind, 0) + n
+
+    def write(self, kind, batch):
+        """Insert a batch of ``(line_no, record)`` pairs of one record type."""
+        if kind != "event" and self.event_id is None:
+            raise ArchiveError(f"line {batch[0][0]}: archive must start with an event record")
+        try:
+            getattr(self, f"_write_{kind}")(batch)
+        except ArchiveError:
+            raise
+        except (KeyError, TypeError, ValueError) as e:
+            raise ArchiveError(f"lines {batch[0][0]}-{batch[-1][0]}: bad {kind} record ({e!r})")
+
+    def _write_event(self, batch):
+        if self.event_id is not None or len(batch) != 1:
+            raise ArchiveError(f"line {batch[-1][0]}: archive holds more than one event")
+        line_no, rec = batch[0]
+        if rec.get("format") != EXPORT_FORMAT or rec.get("version") != EXPORT_VERSION:
+            raise ArchiveError(f"line {line_no}: not a version {EXPORT_VERSION} {EXPORT_FORMAT} archive")
+        event = Event(
+            name=self.name or rec["name"],
+            start_date=date.fromisoformat(rec["start_date"]),
+            end_date=date.fromisoformat(rec["end_date"]) if rec.get("end_date") else None,
+        )
+        db.session.add(event)
+        db.session.flush()
+        self.event_id = event.event_id
+        self._count("events", 1)
+
+    def _write_user(self, batch):
+        by_email = {rec["email"]: rec for _line, rec in batch}
+        existing = dict(db.session.query(User.email, User.user_id).filter(User.email.in_(by_email)))
+        missing = [
+            {"name": rec["name"], "email": email, "pw": PLACEHOLDER_PW}
+            for email, rec in by_email.items() if email not in existing
+        ]
+        if missing:
+            db.session.execute(insert(User), missing)
+            existing.update(
+                db.session.query(User.email, User.user_id)
+                .filter(User.email.in_([row["email"] for row in missing]))
+            )
+            self._count("users_created", len(missing))
+        for email, rec in by_email.items():
+            self.user_map[rec["user_id"]] = existing[email]
+        self._count("users", len(batch))
+
+    def _write_player(self, batch):
+        db.session.execute(insert(EventPlayer), [
+            {"event_id": self.event_id, "user_id": self._user(rec["user_id"], line_no), "score": rec.get("score")}
+            for line_no, rec in batch
+        ])
+        self._count("players", len(batch))
+
+    def _write_role(self, batch):
+        db.session.execute(insert(EventRole), [
+            {"event_id": self.event_id, "user_id": self._user(rec["user_id"], line_no), "role": rec["role"]}
+            for line_no, rec in batch
+        ])
+        self._count("roles", len(batch))
+
+    def _write_match(self, batch):
+        match_ids = insert_matches([
+            {
+                "event_id": self.event_id,
+                "round": rec["round"],
+                "date": date.fromisoformat(rec["date"]),
+                "status": rec["status"],
+            }
+            for _line, rec in batch
+        ])
+        players = [
+            {
+                "match_id": match_id,
+                "user_id": self._user(p["user_id"], line_no),
+                "score": p.get("score"),
+                "result": p.get("result"),
+            }
+            for match_id, (line_no, rec) in zip(match_ids, batch)
+            for p in rec.get("players", ())
+        ]
+        if players:
+            db.session.execute(insert(MatchPlayer), players)
+        self._count("matches", len(batch))
+        self._count("match_players", len(players))
+
+    def _write_standing(self, batch):
+        # derived data: rebuilt from the match history once everything is in
+        pass
+
+
+def _records(lines):
+    for line_no, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except ValueError as e:
+            raise ArchiveError(f"line {line_no}: {e}")
+        if not isinstance(rec, dict) or not hasattr(_Importer, f"_write_{rec.get('type')}"):
+            raise ArchiveError(f"line {line_no}: unknown record type")
+        yield line_no, rec
+
+
+def _runs(records, size):
+    """Group consecutive records of one type into batches of at most ``size``."""
+    kind, batch = None, []
+    for line_no, rec in records:
+        if rec["type"] != kind or len(batch) >= size:
+            if batch:
+                yield kind, batch
+            kind, batch = rec["type"], []
+        batch.append((line_no, rec))
+    if batch:
+        yield kind, batch
+
+
+def import_event(lines, name=None, batch_size=IMPORT_BATCH_SIZE):
+    """Create a new event from the lines of a JSON Lines export.
+
+    ``lines`` may be any iterable of str or bytes lines, e.g. an open file
+    or a request stream. Returns a summary with the new ``event_id``, the
+    number of records of each type and the rows/sec achieved. The caller
+    commits, or rolls back on ArchiveError.
+    """
+    start = time.perf_counter()
+    importer = _Importer(name)
+    for kind, batch in _runs(_records(lines), batch_size):
+        importer.write(kind, batch)
+    if importer.event_id is None:
+        raise ArchiveError("archive is empty")
+
+    db.session.flush()
+    standings.rebuild(importer.event_id)
+
+    elapsed = time.perf_counter() - start
+    rows = sum(n for key, n in importer.counts.items() if key != "users")
+    return {
+        "event_id": importer.event_id,
+        "counts": importer.counts,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed) if elapsed else None,
+    }
@@ -1,10 +1,32 @@
-from flask import request, jsonify
+from flask import Response, current_app, request, jsonify, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.extensions import db
-from app.models import Event, EventPlayer, User, EventRole, Match, MatchPlayer
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+from app.extensions import broker, cache, db
+from app.models import Bracket, Event, EventPlayer, User, EventRole, Match, MatchPlayer
+from app import brackets, live, planning, ratings, standings
+from app.scheduling import bulk_create_matches
+from app.permissions import invalidate_roles, require_event_role, require_site_token
+from app.caching import conditional, event_etag, event_version, touch_event
+from app.routing import read_only
+from app.results import ResultError, assign_results, parse_scores
+from app.roster import import_players, read_emails, upload_content_type
+from app.export import CSV_TABLES, csv_stream, jsonl_stream
+from app.archive import ArchiveError, import_event
 from . import events_bp
-from datetime import datetime, timedelta
-from random import shuffle
+from datetime import datetime
+from itertools import islice
+import random
+
+# most match results accepted by one POST /<event_id>/results
+MAX_BATCH_RESULTS = 1000
+
+# most rows accepted by one POST /<event_id>/players/import
+MAX_IMPORT_ROWS = 50_000
+
+# generated matches listed in a round robin response; larger schedules
+# are saved in full but only counted
+MAX_LISTED_MATCHES = 10_000
 
 
 # helper functions
@@ -14,8 +36,43 @@ def parse_iso(dt_str):
     return datetime.fromisoformat(dt_str)
 
 
+def load_event_snapshot(event_id):
+    """Load an event with its roles, players, matches and match players.
+
+    Every collection is eager loaded so the whole snapshot costs a fixed
+    number of queries no matter how many players or matches the event has.
+    """
+    return (
+        Event.query
+        .options(
+            selectinload(Event.event_roles).joinedload(EventRole.user),
+            selectinload(Event.event_players).joinedload(EventPlayer.user),
+            selectinload(Event.matches)
+            .joinedload(Match.match_players)
+            .joinedload(MatchPlayer.user),
+        )
+        .filter(Event.event_id == event_id)
+        .first_or_404()
+    )
+
+
+def wants_preview():
+    """``?preview=true`` asks a generator for its proposal without saving it."""
+    return request.args.get("preview", "").lower() in ("1", "true", "yes")
+
+
+def event_player_ids(event_id):
+    """User ids holding the "player" role in an event, in registration order."""
+    return [
+        uid for (uid,) in db.session.query(EventRole.user_id)
+        .filter(EventRole.event_id == event_id, EventRole.role == "player")
+        .order_by(EventRole.eo_id)
+    ]
+
+
 # ======== EVENT ENDPOINTS ========
 @events_bp.route("/", methods=["GET"])
+@read_only
 @jwt_required()
 def list_events():
     user_id = get_jwt_identity()
@@ -65,6 +122,7 @@ def create_event():
     role = EventRole(user_id=user_id, event_id=ev.event_id, role="admin")
     db.session.add(role)
     db.session.commit()
+    invalidate_roles(ev.event_id)
 
     return jsonify({
         "event_id": ev.event_id,
@@ -75,122 +133,65 @@ def create_event():
     }), 201
 
 
+@events_bp.route("/import", methods=["POST"])
+@jwt_required()
+@require_site_token("IMPORT_TOKEN")
+def import_event_archive():
+    """Create a new event from a JSON Lines export, uploaded as ``file`` or as the body.
+
+    Importing creates accounts for unknown emails, so besides the login
+    cookie the request needs ``Authorization: Bearer <IMPORT_TOKEN>``. The
+    caller becomes an admin of the new event. ``?name=`` renames it.
+    """
+    user_id = int(get_jwt_identity())
+    upload = request.files.get("file")
+    stream = upload.stream if upload is not None else request.stream
+
+    try:
+        summary = import_event(stream, name=request.args.get("name"))
+    except (ArchiveError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({"msg": f"invalid archive: {e}"}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "invalid archive: duplicate players or roles"}), 400
+
+    event_id = summary["event_id"]
+    if not EventRole.query.filter_by(event_id=event_id, user_id=user_id, role="admin").first():
+        db.session.add(EventRole(user_id=user_id, event_id=event_id, role="admin"))
+    db.session.commit()
+    invalidate_roles(event_id)
+    return jsonify({"msg": "event imported", **summary}), 201
+
+
 @events_bp.route("/<int:event_id>", methods=["GET"])
+@read_only
 @jwt_required()
+@conditional(event_etag)
 def get_event(event_id):
-    user_id = get_jwt_identity()
+    # serve the serialized payload cached for this version of the event
+    version = event_version(event_id)
+    body = cache.get_event(event_id, version)
+    if body is not None:
+        return current_app.response_class(body, mimetype="application/json"), 200
 
-    event = Event.query.get_or_404(event_id)
+    event = load_event_snapshot(event_id)
 
     # get admins
-    admins = (
-        db.session.query(User)
-        .join(EventRole)
-        .filter(EventRole.event_id == event_id, EventRole.role == "admin")
-        .all()
-    )
+    admins = [r.user for r in sorted(event.event_roles, key=lambda r: r.eo_id) if r.role == "admin"]
 
     # get players
-    players = (
-        db.session.query(User)
-        .join(EventPlayer)
-        .filter(EventPlayer.event_id == event_id)
-        .all()
-    )
+    players = [ep.user for ep in sorted(event.event_players, key=lambda ep: ep.ep_id)]
 
     # get matches
-    matches = (
-        db.session.query(Match)
-        .filter(Match.event_id == event_id)
-        .all()
-    )
+    matches = sorted(event.matches, key=lambda m: m.match_id)
 
-    matches_data = []
-    player_stats = {p.user_id: {"name": p.name, "wins": 0, "losses": 0, "ties": 0, "score": 0} for p in players}
-    
-    for m in matches:
-        match_players = [
-            {
-                "user_id": mp.user.user_id,
-                "name": mp.user.name,
-                "score": mp.score,
-                "result": mp.result,
-            }
-            for mp in m.match_players
-        ]
-
-        for mp in match_players:
-            stats = player_stats.get(mp["user_id"])
-            if not stats:
-                continue
-            stats["score"] += mp["score"] or 0
-            if mp["result"] == "win":
-                stats["wins"] += 1
-            elif mp["result"] == "loss":
-                stats["losses"] += 1
-            elif mp["result"] == "tie":
-                stats["ties"] += 1
-
-        result_label = "TBD"
-        if len(match_players) == 2:
-            s1, s2 = match_players[0]["score"], match_players[1]["score"]
-            if s1 > s2:
-                result_label = match_players[0]["name"] + " W " + str(match_players[0]["score"]) + "-" + str(match_players[1]["score"])
-            elif s2 > s1:
-                result_label = match_players[1]["name"] + " W" + str(match_players[1]["score"]) + "-" + str(match_players[0]["score"])
-            else:
-                result_label = "T" + str(match_players[0]["score"]) + "-" + str(match_players[1]["score"])
-
-        team1_name = match_players[0]["name"] if len(match_players) > 0 else "TBD"
-        team2_name = match_players[1]["name"] if len(match_players) > 1 else "TBD"
-        team1_score = match_players[0]["score"] if len(match_players) > 0 else None
-        team2_score = match_players[1]["score"] if len(match_players) > 1 else None
-
-        matches_data.append({
-            "match_id": m.match_id,
-            "match_title": f"{team1_name} vs. {team2_name}",
-            "team1_name": team1_name,
-            "team2_name": team2_name,
-            "team1_score": team1_score,
-            "team2_score": team2_score,
-            "date_played": m.date.isoformat() if m.date else None,
-            "status": m.status,
-            "result_label": result_label
-        })
-
-    # combine player stats to create leaderboard
-    leaderboard = []
-    for pid, stats in player_stats.items():
-        leaderboard.append({
-            "user_id": pid,
-            "name": stats["name"],
-            "wins": stats["wins"],
-            "losses": stats["losses"],
-            "ties": stats["ties"],
-            "score": stats["score"],
-        })
+    matches_data = [live.match_summary(m) for m in matches]
 
-    # sort leaderboard by results
-    leaderboard.sort(key=lambda x: (-x["wins"], x["losses"], -x["ties"], -x["score"], x["name"].lower()))
-
-    # assign each player a rank
-    ranked_leaderboard = []
-    rank = 1
-    for i, player in enumerate(leaderboard):
-        if i > 0:
-            prev = leaderboard[i - 1]
-            same_record = (
-                player["wins"] == prev["wins"]
-                and player["losses"] == prev["losses"]
-                and player["ties"] == prev["ties"]
-                and player["score"] == prev["score"]
-            )
-            if not same_record:
-                rank = i + 1
-        player["rank"] = rank
-        ranked_leaderboard.append(player)
+    # leaderboard is maintained incrementally in the standings table
+    ranked_leaderboard = standings.leaderboard(event_id)
 
-    return jsonify({
+    response = jsonify({
         "event_id": event.event_id,
         "name": event.name,
         "start_date": event.start_date.isoformat() if event.start_date else None,
@@ -199,32 +200,76 @@ def get_event(event_id):
         "players": [{"user_id": p.user_id, "name": p.name, "email": p.email} for p in players],
         "matches": matches_data,
         "leaderboard": ranked_leaderboard,
-    }), 200
+    })
+    cache.set_event(event_id, version, response.get_data())
+    return response, 200
 
 
 @events_bp.route("/<int:event_id>", methods=["DELETE"])
 @jwt_required()
+@require_event_role("admin", msg="admin only")
 def delete_event(event_id):
-    user_id = get_jwt_identity()
-    role = EventRole.query.filter_by(event_id=event_id, user_id=user_id, role="admin").first()
-    if not role:
-        return jsonify({"msg": "admin only"}), 403
-
     event = Event.query.get_or_404(event_id)
     db.session.delete(event)
     db.session.commit()
+    invalidate_roles(event_id)
+    cache.invalidate_event(event_id)
     return jsonify({"msg": "event deleted"}), 200
 
 
+@events_bp.route("/<int:event_id>/export", methods=["GET"])
+@read_only
+@jwt_required()
+@require_event_role("admin", msg="admin only")
+def export_event(event_id):
+    """Stream the whole event as JSON Lines, or one table of it as CSV.
+
+    ``?format=jsonl`` (default) or ``?format=csv&table=matches|players|standings``.
+    """
+    event = Event.query.get_or_404(event_id)
+    fmt = request.args.get("format", "jsonl")
+
+    if fmt == "jsonl":
+        body = jsonl_stream(event)
+        mimetype, filename = "application/x-ndjson", f"event-{event_id}.jsonl"
+    elif fmt == "csv":
+        table = request.args.get("table", "matches")
+        if table not in CSV_TABLES:
+            return jsonify({"msg": f"table must be one of {', '.join(CSV_TABLES)}"}), 400
+        body = csv_stream(event_id, table)
+        mimetype, filename = "text/csv", f"event-{event_id}-{table}.csv"
+    else:
+        return jsonify({"msg": "format must be jsonl or csv"}), 400
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@events_bp.route("/<int:event_id>/stream", methods=["GET"])
+@jwt_required()
+def stream_event(event_id):
+    """Server-Sent Events feed of changes to an event (see app.live)."""
+    if not broker.enabled:
+        return jsonify({"msg": "live updates are disabled"}), 503
+    version = event_version(event_id)
+
+    # the generator never touches the database, so the request's session
+    # and connection are released as soon as the headers go out
+    return Response(
+        live.stream(broker.subscribe(event_id), version, broker.keepalive),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ======== EVENT PLAYER ENDPOINTS ========
 @events_bp.route("/<int:event_id>/players", methods=["POST"])
 @jwt_required()
+@require_event_role("admin", msg="admin only")
 def add_player(event_id):
-    user_id = get_jwt_identity()
-    role = EventRole.query.filter_by(event_id=event_id, user_id=user_id, role="admin").first()
-    if not role:
-        return jsonify({"msg": "admin only"}), 403
-
     data = request.get_json() or {}
     email = data.get("email")
     if not email:
@@ -234,36 +279,70 @@ def add_player(event_id):
     if not user:
         return jsonify({"msg": "user not found"}), 404
 
-    # Prevent duplicate EventPlayer
-    exists = EventPlayer.query.filter_by(event_id=event_id, user_id=user.user_id).first()
-    if exists:
-        return jsonify({"msg": "player already added"}), 400
-
-    # Add EventPlayer entry
+    # Add EventPlayer entry; the unique index rejects duplicates
     ep = EventPlayer(user_id=user.user_id, event_id=event_id)
     db.session.add(ep)
+    try:
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "player already added"}), 400
+    standings.create_standing(ep)
 
     # Ensure EventRole entry exists for "player" role
-    player_role = EventRole.query.filter_by(event_id=event_id, user_id=user.user_id, role="player").first()
-    if not player_role:
-        new_role = EventRole(user_id=user.user_id, event_id=event_id, role="player")
-        db.session.add(new_role)
-
+    try:
+        with db.session.begin_nested():
+            db.session.add(EventRole(user_id=user.user_id, event_id=event_id, role="player"))
+    except IntegrityError:
+        pass
+
+    standings.rerank(event_id)
+    touch_event(event_id)
     db.session.commit()
+    invalidate_roles(event_id, user.user_id)
+    live.notify(event_id, "refresh", {"reason": "players"})
     return jsonify({"msg": "player added", "user_id": user.user_id}), 201
 
 
-@events_bp.route("/<int:event_id>/players/<int:user_id>", methods=["DELETE"])
+@events_bp.route("/<int:event_id>/players/import", methods=["POST"])
 @jwt_required()
-def remove_player(event_id, user_id):
-    current = get_jwt_identity()
-    ev = Event.query.get_or_404(event_id)
+@require_event_role("admin", msg="admin only")
+def import_event_players(event_id):
+    """Register many players at once from a list of emails.
+
+    The list is either an uploaded ``file`` (multipart) or the raw request
+    body: CSV (``email`` column or first column), NDJSON, or a JSON list.
+    """
+    upload = request.files.get("file")
+    if upload is not None:
+        stream = upload.stream
+        content_type = upload_content_type(upload.filename, upload.mimetype)
+    else:
+        stream = request.stream
+        content_type = request.mimetype or ""
+
+    try:
+        summary = import_players(event_id, read_emails(stream, content_type), max_rows=MAX_IMPORT_ROWS)
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        return jsonify({"msg": f"could not read player list: {e}"}), 400
+    except IntegrityError:
+        # someone registered one of these players concurrently; nothing was written
+        db.session.rollback()
+        return jsonify({"msg": "player list changed during import, try again"}), 409
+
+    if summary["added"]:
+        touch_event(event_id)
+        db.session.commit()
+        invalidate_roles(event_id)
+        live.notify(event_id, "refresh", {"reason": "players"})
+    return jsonify({"msg": f"{summary['added']} players added", **summary}), 200
 
-    # check if current user is an admin
-    is_admin = EventRole.query.filter_by(event_id=event_id, user_id=current, role="admin").first()
-    if not is_admin:
-        return jsonify({"msg": "forbidden"}), 403
 
+@events_bp.route("/<int:event_id>/players/<int:user_id>", methods=["DELETE"])
+@jwt_required()
+@require_event_role("admin")
+def remove_player(event_id, user_id):
     # find the EventPlayer
     ep = EventPlayer.query.filter_by(event_id=event_id, user_id=user_id).first()
     if not ep:
@@ -276,15 +355,31 @@ def remove_player(event_id, user_id):
     if player_role:
         db.session.delete(player_role)
 
+    # the removed player's standing goes with them, so the rest move up
+    standings.rerank(event_id)
+    touch_event(event_id)
     db.session.commit()
+    invalidate_roles(event_id, user_id)
+    live.notify(event_id, "refresh", {"reason": "players"})
     return jsonify({"msg": "player removed"}), 200
 
 
 # ======== EVENT MATCH ENDPOINTS ========
 @events_bp.route("/<int:event_id>/matches", methods=["GET"])
+@read_only
 @jwt_required()
+@conditional(event_etag)
 def get_event_matches(event_id):
-    ev = Event.query.get_or_404(event_id)
+    ev = (
+        Event.query
+        .options(
+            selectinload(Event.matches)
+            .joinedload(Match.match_players)
+            .joinedload(MatchPlayer.user)
+        )
+        .filter(Event.event_id == event_id)
+        .first_or_404()
+    )
     matches = [
         {
             "match_id": m.match_id,
@@ -296,23 +391,16 @@ def get_event_matches(event_id):
                 for mp in m.match_players
             ],
         }
-        for m in ev.matches
+        for m in sorted(ev.matches, key=lambda m: m.match_id)
     ]
     return jsonify(matches)
 
 
 @events_bp.route("/<int:event_id>/matches", methods=["POST"])
 @jwt_required()
+@require_event_role("admin", msg="Only admins can schedule matches")
 def create_match(event_id):
     data = request.get_json()
-    current_user = int(get_jwt_identity())
-
-    ev = Event.query.get_or_404(event_id)
-
-    # check admin permission
-    is_admin = any(role.user_id == current_user for role in ev.event_roles if role.role == "admin")
-    if not is_admin:
-        return jsonify({"msg": "Only admins can schedule matches"}), 403
 
     player1_id = data.get("player1_id")
     player2_id = data.get("player2_id")
@@ -332,208 +420,270 @@ def create_match(event_id):
     mp1 = MatchPlayer(match_id=match.match_id, user_id=player1_id)
     mp2 = MatchPlayer(match_id=match.match_id, user_id=player2_id)
     db.session.add_all([mp1, mp2])
+    touch_event(event_id)
+    db.session.flush()
+    summary = live.match_summary(match)
     db.session.commit()
 
+    live.notify(event_id, "matches", {"matches": [summary]})
     return jsonify({"msg": "Match created", "match_id": match.match_id}), 201
 
 
 @events_bp.route("/<int:event_id>/generate_round_robin", methods=["POST"])
 @jwt_required()
+@require_event_role("admin", msg="Only admins can generate round robin")
 def generate_round_robin(event_id):
-    current_user = int(get_jwt_identity())
-    ev = Event.query.get_or_404(event_id)
-
-    # check admin permission
-    is_admin = any(r.user_id == current_user and r.role == "admin" for r in ev.event_roles)
-    if not is_admin:
-        return jsonify({"msg": "Only admins can generate round robin"}), 403
+    """Schedule every player against every other, one round a week.
 
+    ``?legs=2`` plays a double round robin, the second leg with home and
+    away swapped. With ``?preview=true`` the schedule is returned without
+    being saved. The schedule is streamed into the database, and only its
+    first ``MAX_LISTED_MATCHES`` matches are listed in the response.
+    """
     # gather only players from this event
-    players = [r.user_id for r in ev.event_roles if r.role == "player"]
+    players = event_player_ids(event_id)
     if len(players) < 2:
         return jsonify({"msg": "Need at least two players"}), 400
-
-    # add dummy "Bye" if odd count
-    dummy_id = None
-    if len(players) % 2 != 0:
-        dummy = User.query.filter_by(email="__DUMMY__").first()
-        if not dummy:
-            dummy = User(name="Bye", email="__DUMMY__")
-            db.session.add(dummy)
-            db.session.commit()
-        dummy_id = dummy.user_id
-        players.append(dummy_id)
-
-    # round-robin (circle method)
-    num_players = len(players)
-    rounds = num_players - 1
-    half = num_players // 2
-    player_list = players[:]
-    schedule = []
-
-    for r in range(rounds):
-        pairs = []
-        for i in range(half):
-            p1 = player_list[i]
-            p2 = player_list[num_players - 1 - i]
-            if dummy_id not in (p1, p2):  # skip bye matches
-                pairs.append((p1, p2))
-        schedule.append(pairs)
-
-        # correct rotation: fix first, rotate remainder clockwise
-        fixed = player_list[0]
-        rotating = player_list[1:]
-        rotating = [rotating[-1]] + rotating[:-1]
-        player_list = [fixed] + rotating
-
-    # schedule matches one week apart
-    start_date = datetime.now().date() + timedelta(days=7)
-    created = []
-    for round_num, round_pairs in enumerate(schedule, start=1):
-        match_date = start_date + timedelta(weeks=round_num - 1)
-        for p1, p2 in round_pairs:
-            match = Match(
-                event_id=event_id,
-                round=round_num,
-                date=match_date,
-                status="scheduled",
-            )
-            db.session.add(match)
-            db.session.flush()
-            db.session.add_all([
-                MatchPlayer(match_id=match.match_id, user_id=p1),
-                MatchPlayer(match_id=match.match_id, user_id=p2),
-            ])
-            created.append({"round": round_num, "p1": p1, "p2": p2})
+    legs = request.args.get("legs", 1, type=int)
+    if legs not in (1, 2):
+        return jsonify({"msg": "legs must be 1 or 2"}), 400
+
+    start_date = planning.first_round_date(None, datetime.now().date())
+    total = planning.round_robin_matches(len(players), legs)
+    listed = [
+        {"round": round_num, "date": match_date.isoformat(), "p1": p1, "p2": p2}
+        for round_num, match_date, p1, p2
+        in islice(planning.round_robin(players, start_date, legs), MAX_LISTED_MATCHES)
+    ]
+    body = {
+        "rounds": planning.round_robin_rounds(len(players), legs),
+        "total": total,
+        "matches": listed,
+    }
+    if wants_preview():
+        return jsonify({"msg": f"Would generate {total} matches", "preview": True, **body}), 200
+
+    bulk_create_matches(event_id, planning.round_robin(players, start_date, legs))
+    touch_event(event_id)
     db.session.commit()
 
-    return jsonify({"msg": f"Generated {len(created)} matches", "matches": created}), 201
+    live.notify(event_id, "refresh", {"reason": "matches"})
+    return jsonify({"msg": f"Generated {total} matches", **body}), 201
 
 
 @events_bp.route("/<int:event_id>/generate_swiss_round", methods=["POST"])
 @jwt_required()
+@require_event_role("admin", msg="Only admins can generate Swiss rounds")
 def generate_swiss_round(event_id):
+    """Pair the next Swiss round by points, avoiding rematches.
 
-    current_user = int(get_jwt_identity())
-    ev = Event.query.get_or_404(event_id)
-
-    # admin check
-    is_admin = any(r.user_id == current_user and r.role == "admin" for r in ev.event_roles)
-    if not is_admin:
-        return jsonify({"msg": "Only admins can generate Swiss rounds"}), 403
-
+    With ``?preview=true`` the pairings are returned without being saved.
+    Players on equal points are shuffled; the response's ``seed`` can be
+    passed back as ``?seed=`` to save exactly the pairings previewed, as
+    long as no results came in meanwhile.
+    """
     # get all players only (exclude admins)
-    players = [r.user_id for r in ev.event_roles if r.role == "player"]
+    players = event_player_ids(event_id)
     if len(players) < 2:
         return jsonify({"msg": "Need at least two players"}), 400
+    seed = request.args.get("seed", type=int)
+    if seed is None:
+        seed = random.randrange(2**31)
 
-    # handle odd number of players (bye round)
-    has_bye = len(players) % 2 != 0
+    # compute points, past pairings and byes from completed results
+    history = standings.load_history(event_id)
+    byes = standings.had_bye(event_id, players)
 
-    # compute points from past results
-    points = {pid: 0 for pid in players}
-    past_matches = (
-        Match.query.join(MatchPlayer)
-        .filter(Match.event_id == event_id, Match.status == "completed")
-        .all()
+    # next round, a week after the last match
+    last_round, last_date = (
+        db.session.query(db.func.max(Match.round), db.func.max(Match.date))
+        .filter(Match.event_id == event_id)
+        .one()
     )
+    next_round = (last_round or 0) + 1
+    start_date = planning.first_round_date(last_date, datetime.now().date())
 
-    # keep track of who played who before
-    played_pairs = set()
+    # pair by score group without rematches, lowest ranked player gets the bye
+    schedule, bye = planning.swiss_round(
+        players, history.points, history.played_pairs, byes, next_round, start_date, seed=seed,
+    )
+    created = [
+        {
+            "round": next_round,
+            "p1": p1,
+            "p2": p2,
+            "points_p1": history.points.get(p1, 0),
+            "points_p2": history.points.get(p2, 0),
+        }
+        for _round, _date, p1, p2 in schedule
+    ]
+    body = {
+        "round": next_round,
+        "date": start_date.isoformat(),
+        "matches": created,
+        "bye": bye,
+        "seed": seed,
+    }
+    if wants_preview():
+        return jsonify({"msg": f"Would generate {len(created)} Swiss round {next_round} matches", "preview": True, **body}), 200
+
+    bulk_create_matches(event_id, schedule)
+    touch_event(event_id)
+    db.session.commit()
+
+    live.notify(event_id, "refresh", {"reason": "matches"})
+    return jsonify({"msg": f"Generated {len(created)} Swiss round {next_round} matches", **body}), 201
 
-    for match in past_matches:
-        mps = MatchPlayer.query.filter_by(match_id=match.match_id).all()
-        if len(mps) != 2:
-            continue
-        p1, p2 = mps[0].user_id, mps[1].user_id
-        # only track pairs where both were players
-        if p1 in players and p2 in players:
-            played_pairs.add(tuple(sorted((p1, p2))))
-
-        # infer results from MatchPlayer entries
-        r1, r2 = mps[0].result, mps[1].result
-        if p1 in players and p2 in players:
-            if r1 == "draw" or r2 == "draw":
-                points[p1] += 1
-                points[p2] += 1
-            elif r1 == "win":
-                points[p1] += 3
-            elif r2 == "win":
-                points[p2] += 3
-
-    # determine next round
-    last_round = db.session.query(db.func.max(Match.round)).filter_by(event_id=event_id).scalar() or 0
-    next_round = last_round + 1
-
-    # sort Swiss style (by points desc, random within groups)
-    groups = {}
-    for pid in players:
-        groups.setdefault(points[pid], []).append(pid)
-    sorted_players = []
-    for pts, group in sorted(groups.items(), key=lambda x: -x[0]):
-        shuffle(group)
-        sorted_players.extend(group)
-
-    # try pairing without repeats
-    pairs = []
-    unpaired = sorted_players[:]
-    while unpaired:
-        p1 = unpaired.pop(0)
-        if not unpaired:
-            # bye round: skip creating match entirely
-            continue
 
-        p2 = None
-        for candidate in unpaired:
-            if tuple(sorted((p1, candidate))) not in played_pairs:
-                p2 = candidate
-                break
+@events_bp.route("/<int:event_id>/generate_bracket", methods=["POST"])
+@jwt_required()
+@require_event_role("admin", msg="Only admins can generate brackets")
+def generate_bracket(event_id):
+    """Start a single or double elimination bracket.
+
+    Body: ``{"format": "single" | "double", "top_cut": 8, "seeds": [user_id, ...]}``.
+    Players are seeded in ``seeds`` order if given, otherwise by the current
+    standings; ``top_cut`` keeps only the best N. Only matches whose players
+    are known are created now, the rest as results come in.
+    """
+    data = request.get_json() or {}
+    fmt = data.get("format", "single")
+    players = event_player_ids(event_id)
+
+    seeds = data.get("seeds")
+    if seeds is not None:
+        if not isinstance(seeds, list) or not all(isinstance(uid, int) for uid in seeds):
+            return jsonify({"msg": "seeds must be a list of user ids"}), 400
+        if not set(seeds) <= set(players):
+            return jsonify({"msg": "seeds must be players in this event"}), 400
+    else:
+        seeds = [row["user_id"] for row in standings.leaderboard(event_id)]
+
+    top_cut = data.get("top_cut")
+    if top_cut is not None:
+        if not isinstance(top_cut, int) or not 2 <= top_cut <= len(seeds):
+            return jsonify({"msg": f"top_cut must be between 2 and {len(seeds)}"}), 400
+        seeds = seeds[:top_cut]
+
+    if Bracket.query.filter_by(event_id=event_id).first() is not None:
+        return jsonify({"msg": "event already has a bracket"}), 409
+
+    last_date = db.session.query(db.func.max(Match.date)).filter(Match.event_id == event_id).scalar()
+    start_date = planning.first_round_date(last_date, datetime.now().date())
+    try:
+        bracket, created = brackets.create_bracket(event_id, fmt, seeds, start_date)
+    except brackets.BracketError as e:
+        return jsonify({"msg": str(e)}), 400
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "event already has a bracket"}), 409
+
+    touch_event(event_id)
+    db.session.commit()
 
-        if p2 is None:
-            p2 = unpaired[0]
+    live.notify(event_id, "refresh", {"reason": "matches"})
+    return jsonify({
+        "msg": f"Generated {fmt} elimination bracket for {len(seeds)} players",
+        "bracket_id": bracket.bracket_id,
+        "size": bracket.size,
+        "matches": created,
+    }), 201
 
-        unpaired.remove(p2)
-        pairs.append((p1, p2))
-        played_pairs.add(tuple(sorted((p1, p2))))
 
-    # determine match date
-    last_match = (
-        Match.query.filter_by(event_id=event_id)
-        .order_by(Match.date.desc())
-        .first()
-    )
-    start_date = (
-        (last_match.date + timedelta(weeks=1))
-        if last_match else datetime.now().date() + timedelta(days=7)
-    )
+@events_bp.route("/<int:event_id>/bracket", methods=["GET"])
+@read_only
+@jwt_required()
+@conditional(event_etag)
+def get_bracket(event_id):
+    bracket = Bracket.query.filter_by(event_id=event_id).first()
+    if bracket is None:
+        return jsonify({"msg": "event has no bracket"}), 404
+    return jsonify(brackets.render(bracket))
 
-    # create matches
-    created = []
-    for p1, p2 in pairs:
-        match = Match(
-            event_id=event_id,
-            round=next_round,
-            date=start_date,
-            status="scheduled",
-        )
-        db.session.add(match)
-        db.session.flush()
 
-        db.session.add(MatchPlayer(match_id=match.match_id, user_id=p1))
-        db.session.add(MatchPlayer(match_id=match.match_id, user_id=p2))
+@events_bp.route("/<int:event_id>/results", methods=["POST"])
+@jwt_required()
+@require_event_role("admin", msg="Only admins can record results in bulk")
+def record_results_batch(event_id):
+    """Record many match results in one transaction.
+
+    Expects ``{"results": [{"match_id": 1, "scores": {"<user_id>": 3, ...}}, ...]}``.
+    Entries that fail validation are reported in ``errors`` and skipped;
+    the rest are written together and the standings are re-ranked once.
+    """
+    data = request.get_json() or {}
+    entries = data.get("results")
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"msg": "results must be a non-empty list"}), 400
+    if len(entries) > MAX_BATCH_RESULTS:
+        return jsonify({"msg": f"at most {MAX_BATCH_RESULTS} results per request"}), 400
+
+    match_ids = {e.get("match_id") for e in entries if isinstance(e, dict) and isinstance(e.get("match_id"), int)}
+    matches = {
+        m.match_id: m
+        for m in Match.query
+        .options(selectinload(Match.match_players).joinedload(MatchPlayer.user))
+        .filter(Match.event_id == event_id, Match.match_id.in_(match_ids))
+    }
+    rows = standings.event_standings(event_id)
+
+    recorded, errors, seen = [], [], set()
+    summaries, changed, newly_completed, created = [], [], [], []
+    for i, entry in enumerate(entries):
+        match_id = entry.get("match_id") if isinstance(entry, dict) else None
+        match = matches.get(match_id)
+        if match is None:
+            errors.append({"index": i, "match_id": match_id, "msg": "match not found in this event"})
+            continue
+        if match_id in seen:
+            errors.append({"index": i, "match_id": match_id, "msg": "duplicate match in batch"})
+            continue
+        seen.add(match_id)
+
+        try:
+            scores = parse_scores(match, entry.get("scores"))
+            if match.bracket_id is not None:
+                brackets.check_result(match, scores)
+        except (ResultError, brackets.BracketError) as e:
+            errors.append({"index": i, "match_id": match_id, "msg": str(e)})
+            continue
 
-        created.append({
-            "round": next_round,
-            "p1": p1,
-            "p2": p2,
-            "points_p1": points[p1],
-            "points_p2": points[p2],
-        })
+        # results being re-recorded replace the ones already counted in the standings
+        if any(mp.result for mp in match.match_players):
+            changed += standings.apply_match(match, sign=-1, rows=rows)
+        assign_results(match, scores)
+        # advanced before the next entry is checked, so an entry correcting
+        # a match that an earlier entry already moved on from is rejected
+        if match.bracket_id is not None:
+            created += brackets.advance(match)
+        changed += standings.apply_match(match, rows=rows)
+        recorded.append(match_id)
+        if match.status != "completed":
+            newly_completed.append(match)
+        # status is written by the bulk UPDATE below
+        summaries.append({**live.match_summary(match), "status": "completed"})
+
+    if recorded:
+        db.session.flush()
+        db.session.execute(
+            db.update(Match)
+            .where(Match.match_id.in_(recorded))
+            .values(status="completed", version=Match.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        changed += standings.rerank(event_id)
+        ratings.rate_matches(newly_completed)
+        delta = live.standing_rows(changed)
+        touch_event(event_id)
+        db.session.commit()
 
-    db.session.commit()
+        live.notify(event_id, "matches", {"matches": summaries})
+        live.notify(event_id, "standings", {"rows": delta})
+        if created:
+            live.notify(event_id, "refresh", {"reason": "matches"})
 
     return jsonify({
-        "msg": f"Generated {len(created)} Swiss round {next_round} matches",
-        "round": next_round,
-        "matches": created,
-    }), 201
+        "msg": f"Recorded {len(recorded)} results",
+        "recorded": recorded,
+        "errors": errors,
+    }), 200
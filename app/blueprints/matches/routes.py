@@ -1,9 +1,21 @@
 from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import contains_eager, selectinload
 from app.extensions import db
-from app.models import Match, MatchPlayer, Event, EventRole, EventPlayer, User
+from app.models import Match, MatchPlayer, EventRole, EventPlayer, User
+from app import brackets, live, ratings, standings
+from app.permissions import has_event_role
+from app.caching import conditional, match_etag, touch_event
+from app.routing import read_only
+from app.results import ResultError, assign_results, parse_scores
 from . import matches_bp
 from datetime import datetime
+import base64
+
+# page sizes for GET /api/matches
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
 
 
 def _to_int_id(val):
@@ -13,36 +25,101 @@ def _to_int_id(val):
         return val
 
 
+def encode_cursor(match):
+    raw = f"{match.date.isoformat()}|{match.match_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Turn an opaque next_cursor back into (date, match_id); raises ValueError if malformed."""
+    raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    date_str, match_id = raw.split("|")
+    return datetime.strptime(date_str, "%Y-%m-%d").date(), int(match_id)
+
+
 @matches_bp.route("/", methods=["GET"])
+@read_only
 @jwt_required()
 def get_user_matches():
+    """A page of a user's matches, keyset-paginated on (date, match_id).
+
+    Query parameters: user_id (required), limit (default 50, max 200),
+    cursor (next_cursor of the previous page), order ("desc" newest first,
+    or "asc"), status and event_id filters.
+    """
     user_id = request.args.get("user_id", type=int)
     if not user_id:
         return jsonify({"msg": "user_id query parameter required"}), 400
 
+    limit = request.args.get("limit", DEFAULT_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    order = request.args.get("order", "desc")
+    if order not in ("asc", "desc"):
+        return jsonify({"msg": "order must be asc or desc"}), 400
+
     user = User.query.get_or_404(user_id)
 
-    # join tables
-    matches = (
-        db.session.query(Match, Event)
-        .join(MatchPlayer)
-        .join(Event)
+    # join tables; opponents and the event are loaded with the page
+    query = (
+        db.session.query(Match)
+        .join(MatchPlayer, MatchPlayer.match_id == Match.match_id)
+        .join(Match.event)
         .filter(MatchPlayer.user_id == user_id)
-        .all()
+        .options(
+            contains_eager(Match.event),
+            selectinload(Match.match_players).joinedload(MatchPlayer.user),
+        )
     )
 
+    status = request.args.get("status")
+    if status:
+        query = query.filter(Match.status == status)
+    event_id = request.args.get("event_id", type=int)
+    if event_id:
+        query = query.filter(Match.event_id == event_id)
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        try:
+            after_date, after_id = decode_cursor(cursor)
+        except (ValueError, UnicodeDecodeError):
+            return jsonify({"msg": "invalid cursor"}), 400
+        if order == "desc":
+            query = query.filter(or_(
+                Match.date < after_date,
+                and_(Match.date == after_date, Match.match_id < after_id),
+            ))
+        else:
+            query = query.filter(or_(
+                Match.date > after_date,
+                and_(Match.date == after_date, Match.match_id > after_id),
+            ))
+
+    if order == "desc":
+        query = query.order_by(Match.date.desc(), Match.match_id.desc())
+    else:
+        query = query.order_by(Match.date.asc(), Match.match_id.asc())
+
+    # fetch one extra row to learn whether another page exists
+    matches = query.limit(limit + 1).all()
+    next_cursor = encode_cursor(matches[limit - 1]) if len(matches) > limit else None
+    matches = matches[:limit]
+
     result = []
-    for match, event in matches:
+    for match in matches:
+        event = match.event
+
         # get the two players
-        players = [mp.user.name for mp in match.match_players]
+        match_players = sorted(match.match_players, key=lambda mp: mp.mp_id)
+        players = [mp.user.name for mp in match_players]
         title = f"{players[0]} vs {players[1]}" if len(players) == 2 else f"Round {match.round}"
 
         # get user's own match_player entry
-        user_mp = next((mp for mp in match.match_players if mp.user_id == user_id), None)
+        user_mp = next((mp for mp in match_players if mp.user_id == user_id), None)
 
         if user_mp:
             result_label = user_mp.result or "-"
-            opponent_mp = next((mp for mp in match.match_players if mp.user_id != user_id), None)
+            opponent_mp = next((mp for mp in match_players if mp.user_id != user_id), None)
             if opponent_mp:
                 result_label = f"{user_mp.score}-{opponent_mp.score} {result_label}"
         else:
@@ -60,11 +137,13 @@ def get_user_matches():
             "end_date": event.end_date.isoformat() if event.end_date else None
         })
 
-    return jsonify(result), 200
+    return jsonify({"matches": result, "next_cursor": next_cursor}), 200
 
 
 @matches_bp.route("/<int:match_id>", methods=["GET"])
+@read_only
 @jwt_required()
+@conditional(match_etag)
 def get_match(match_id):
     m = Match.query.get_or_404(match_id)
 
@@ -98,14 +177,28 @@ def delete_match(match_id):
     m = Match.query.get_or_404(match_id)
 
     # check admin permission via EventRole
-    is_admin = EventRole.query.filter_by(event_id=m.event_id, user_id=current, role="admin").first()
-    if not is_admin:
+    if not has_event_role(current, m.event_id, "admin"):
         return jsonify({"msg": "forbidden"}), 403
 
+    # later bracket matches are built from this one's result
+    if m.bracket_id is not None:
+        return jsonify({"msg": "bracket matches can't be deleted"}), 409
+
+    # take the match's results back out of the standings
+    event_id = m.event_id
+    changed = standings.apply_match(m, sign=-1)
+
     # remove MatchPlayer rows first
     MatchPlayer.query.filter_by(match_id=match_id).delete()
     db.session.delete(m)
+    changed += standings.rerank(event_id)
+    rows = live.standing_rows(changed)
+    touch_event(event_id)
     db.session.commit()
+
+    live.notify(event_id, "match_deleted", {"match_id": match_id})
+    if rows:
+        live.notify(event_id, "standings", {"rows": rows})
     return jsonify({"msg": "match deleted"}), 200
 
 
@@ -116,11 +209,7 @@ def record_results(match_id):
     current_user = int(get_jwt_identity())
 
     # check either event admin or one of the match players
-    is_admin = db.session.query(EventRole).filter_by(
-        event_id=match.event_id,
-        user_id=current_user,
-        role="admin"
-    ).first() is not None
+    is_admin = has_event_role(current_user, match.event_id, "admin")
 
     is_player = any(mp.user_id == current_user for mp in match.match_players)
 
@@ -128,36 +217,40 @@ def record_results(match_id):
         return jsonify({"msg": "Not authorized to record results"}), 403
 
     data = request.get_json() or {}
-    scores = data.get("scores")
+    try:
+        scores = parse_scores(match, data.get("scores"))
+        if match.bracket_id is not None:
+            brackets.check_result(match, scores)
+    except ResultError as e:
+        return jsonify({"msg": str(e)}), 400
+    except brackets.BracketError as e:
+        return jsonify({"msg": str(e)}), 409
 
-    if not scores or len(scores) != len(match.match_players):
-        return jsonify({"msg": "Scores must be provided for all match players"}), 400
+    # results being re-recorded replace the ones already counted in the standings
+    changed = []
+    if any(mp.result for mp in match.match_players):
+        changed += standings.apply_match(match, sign=-1)
 
-    # assign scores as integers
-    for mp in match.match_players:
-        if str(mp.user_id) not in scores:
-            return jsonify({"msg": f"Missing score for player {mp.user_id}"}), 400
-        try:
-            mp.score = int(scores[str(mp.user_id)])
-        except ValueError:
-            return jsonify({"msg": f"Invalid score for player {mp.user_id}"}), 400
-
-    # determine results (win/loss/tie)
-    if len(match.match_players) != 2:
-        return jsonify({"msg": "Currently only supports 2-player matches"}), 400
-
-    p1, p2 = match.match_players
-    if p1.score > p2.score:
-        p1.result = "win"
-        p2.result = "loss"
-    elif p2.score > p1.score:
-        p2.result = "win"
-        p1.result = "loss"
-    else:
-        p1.result = p2.result = "tie"
+    assign_results(match, scores)
 
     # mark match as completed
+    newly_completed = match.status != "completed"
     match.status = "completed"
-
+    match.version = Match.version + 1
+
+    changed += standings.apply_match(match)
+    changed += standings.rerank(match.event_id)
+    if newly_completed:
+        ratings.rate_matches([match])
+    created = brackets.advance(match) if match.bracket_id is not None else []
+    event_id = match.event_id
+    summary = live.match_summary(match)
+    rows = live.standing_rows(changed)
+    touch_event(event_id)
     db.session.commit()
-    return jsonify({"msg": "Results recorded", "match_id": match.match_id}), 200
+
+    live.notify(event_id, "matches", {"matches": [summary]})
+    live.notify(event_id, "standings", {"rows": rows})
+    if created:
+        live.notify(event_id, "refresh", {"reason": "matches"})
+    return jsonify({"msg": "Results recorded", "match_id": match_id}), 200
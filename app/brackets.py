@@ -0,0 +1,335 @@
+"""Single and double elimination brackets.
+
+A bracket is one ``Bracket`` row whose ``state`` holds three arrays
+indexed by node: the two slots of each node (user ids, ``BYE``, or None
+while a feeder is still being played), its winner, and the match_id
+played for it. Nodes are numbered like a binary heap: the winners
+bracket final is node 1 and node i is fed by nodes 2i and 2i + 1, so the
+first round is nodes size/2 .. size - 1 and a winner moves up to node
+i // 2. In double elimination the losers bracket follows (nodes size ..
+2 * size - 3, round by round), then the grand final (node 2 * size - 2)
+and its reset (node 2 * size - 1). The reset is only played if the
+losers bracket player wins the grand final; otherwise the winners
+bracket player takes it with a bye.
+
+Where each node's winner and loser go is a fixed ``Layout`` for the
+format and size, so working out what a result changes takes constant
+time. The state is still written back whole, though: every recorded
+result is one UPDATE of the bracket row, O(size) bytes of JSON. Match
+rows are only created once both players of a node are known, and byes
+advance without a match. Rendering a bracket reads the one row plus the
+players' names, never the match rows.
+"""
+from functools import lru_cache
+from sqlalchemy import insert
+from sqlalchemy.orm.attributes import flag_modified
+from app.extensions import db
+from app.models import Bracket, Match, MatchPlayer, User
+from app.results import ResultError
+from app.scheduling import insert_matches
+
+FORMATS = ("single", "double")
+# fills the slots of missing seeds; a player facing a bye advances
+BYE = 0
+# fewest players per format (double elimination needs a losers bracket)
+MIN_PLAYERS = {"single": 2, "double": 3}
+
+
+class BracketError(ValueError):
+    """A bracket can't be created, or a result would rewrite decided matches."""
+
+
+def bracket_size(players):
+    """Smallest power of two that seats ``players``."""
+    size = 2
+    while size < players:
+        size *= 2
+    return size
+
+
+def seed_order(size):
+    """Seeds in bracket position order, so seeds 1 and 2 can only meet in the final.
+
+    ``seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]``
+    """
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [s for seed in order for s in (seed, total - seed)]
+    return order
+
+
+class Layout:
+    """The fixed shape of a bracket: for every node its side and round,
+    the wave it can be played in (1 for the first round, and one more
+    than its latest feeder after that), and the ``(node, slot)`` its
+    winner and loser move to (None when they leave the bracket).
+    """
+
+    def __init__(self, fmt, size):
+        self.format = fmt
+        self.size = size
+        self.rounds = size.bit_length() - 1
+        self.nodes = size - 1 if fmt == "single" else 2 * size - 1
+        # the grand final and its reset, in double elimination
+        self.grand_final = self.reset = None
+        self.side = [None] * (self.nodes + 1)
+        self.round = [0] * (self.nodes + 1)
+        self.wave = [0] * (self.nodes + 1)
+        self.winner_to = [None] * (self.nodes + 1)
+        self.loser_to = [None] * (self.nodes + 1)
+
+        for node in range(1, size):
+            self.side[node] = "winners"
+            self.round[node] = self.rounds - (node.bit_length() - 1)
+            self.wave[node] = self.round[node]
+            if node > 1:
+                self.winner_to[node] = (node // 2, node % 2)
+        if fmt == "double":
+            self._losers_bracket()
+
+    def _winners_node(self, round_num, index):
+        return self.size // 2 ** round_num + index
+
+    def _feed(self, node, slot, source, loser=False):
+        (self.loser_to if loser else self.winner_to)[source] = (node, slot)
+        self.wave[node] = max(self.wave[node], self.wave[source] + 1)
+
+    def _losers_bracket(self):
+        """Odd losers rounds pair up the survivors; even ones take on the
+        players dropping out of the next winners round, in alternating
+        order so early rematches are pushed back."""
+        node = self.size
+        previous = []
+        for round_num in range(1, 2 * self.rounds - 1):
+            count = self.size // 2 ** ((round_num + 1) // 2 + 1)
+            current = list(range(node, node + count))
+            node += count
+            for j, lb_node in enumerate(current):
+                self.side[lb_node] = "losers"
+                self.round[lb_node] = round_num
+                if round_num == 1:
+                    self._feed(lb_node, 0, self._winners_node(1, 2 * j), loser=True)
+                    self._feed(lb_node, 1, self._winners_node(1, 2 * j + 1), loser=True)
+                elif round_num % 2 == 0:
+                    dropping = count - 1 - j if (round_num // 2) % 2 else j
+                    self._feed(lb_node, 0, previous[j])
+                    self._feed(lb_node, 1, self._winners_node(round_num // 2 + 1, dropping), loser=True)
+                else:
+                    self._feed(lb_node, 0, previous[2 * j])
+                    self._feed(lb_node, 1, previous[2 * j + 1])
+            previous = current
+
+        self.grand_final, self.reset = node, node + 1
+        self.side[node] = self.side[node + 1] = "final"
+        self.round[node], self.round[node + 1] = 1, 2
+        self._feed(node, 0, 1)
+        self._feed(node, 1, previous[0])
+        # the reset is seated by _decide rather than through winner_to and
+        # loser_to, since who plays in it depends on who won the grand final
+        self.wave[node + 1] = self.wave[node] + 1
+
+    @property
+    def final(self):
+        """The node whose winner takes the bracket."""
+        return self.nodes if self.format == "double" else 1
+
+
+@lru_cache(maxsize=32)
+def layout(fmt, size):
+    return Layout(fmt, size)
+
+
+def _place(lay, state, node, slot, user, ready):
+    """Seat ``user`` in a node; once both slots are filled the node is
+    either ready for a match or, with a bye, decided on the spot."""
+    slots = state["slots"][node]
+    slots[slot] = user
+    if None in slots:
+        return
+    if BYE not in slots:
+        ready.append(node)
+        return
+    winner = slots[1] if slots[0] == BYE else slots[0]
+    _decide(lay, state, node, winner, BYE, ready)
+
+
+def _decide(lay, state, node, winner, loser, ready):
+    state["winners"][node] = winner
+    if lay.winner_to[node]:
+        _place(lay, state, *lay.winner_to[node], winner, ready)
+    if lay.loser_to[node]:
+        _place(lay, state, *lay.loser_to[node], loser, ready)
+    if node == lay.grand_final:
+        # the winners bracket player (slot 0) has yet to lose, so the
+        # losers bracket player has to beat them twice
+        wb_player, lb_player = state["slots"][node]
+        _place(lay, state, lay.reset, 0, wb_player, ready)
+        _place(lay, state, lay.reset, 1, lb_player if winner == lb_player else BYE, ready)
+
+
+def _create_matches(bracket, lay, nodes, match_date):
+    """Insert the matches for ``nodes`` and record their ids; returns the ids."""
+    if not nodes:
+        return []
+    state = bracket.state
+    match_ids = insert_matches([
+        {
+            "event_id": bracket.event_id,
+            "round": bracket.first_round - 1 + lay.wave[node],
+            "date": match_date,
+            "status": "scheduled",
+            "bracket_id": bracket.bracket_id,
+            "bracket_node": node,
+        }
+        for node in nodes
+    ])
+    db.session.execute(insert(MatchPlayer), [
+        {"match_id": match_id, "user_id": user_id}
+        for match_id, node in zip(match_ids, nodes)
+        for user_id in state["slots"][node]
+    ])
+    for match_id, node in zip(match_ids, nodes):
+        state["matches"][node] = match_id
+    return match_ids
+
+
+def create_bracket(event_id, fmt, seeds, start_date):
+    """Build a bracket for ``seeds`` (user ids, best seed first).
+
+    Rounds are numbered after the event's existing matches, so a top cut
+    follows the Swiss rounds. Only the first matches are created, dated
+    ``start_date``. Returns ``(bracket, created match_ids)``; raises
+    BracketError for an unknown format or too few or repeated players.
+    """
+    if fmt not in FORMATS:
+        raise BracketError(f"format must be one of {', '.join(FORMATS)}")
+    if len(seeds) < MIN_PLAYERS[fmt]:
+        raise BracketError(f"{fmt} elimination needs at least {MIN_PLAYERS[fmt]} players")
+    if len(set(seeds)) != len(seeds):
+        raise BracketError("players can only be seeded once")
+
+    size = bracket_size(len(seeds))
+    lay = layout(fmt, size)
+    last_round = db.session.query(db.func.max(Match.round)).filter_by(event_id=event_id).scalar() or 0
+    state = {
+        "slots": [[None, None] for _ in range(lay.nodes + 1)],
+        "winners": [None] * (lay.nodes + 1),
+        "matches": [None] * (lay.nodes + 1),
+    }
+    ready = []
+    order = seed_order(size)
+    for index, node in enumerate(range(size // 2, size)):
+        for slot in (0, 1):
+            seed = order[2 * index + slot]
+            _place(lay, state, node, slot, seeds[seed - 1] if seed <= len(seeds) else BYE, ready)
+
+    bracket = Bracket(event_id=event_id, format=fmt, size=size, first_round=last_round + 1, state=state)
+    db.session.add(bracket)
+    db.session.flush()
+    return bracket, _create_matches(bracket, lay, ready, start_date)
+
+
+def _locked(bracket_id):
+    """The bracket, with its row locked until commit so concurrent results
+    don't overwrite each other's state. Locking selects only the key, so a
+    bracket already loaded in this session isn't read again."""
+    db.session.execute(
+        db.select(Bracket.bracket_id).where(Bracket.bracket_id == bracket_id).with_for_update()
+    )
+    return db.session.get(Bracket, bracket_id)
+
+
+def check_result(match, scores):
+    """Raise if ``scores`` (user_id -> score) can't be recorded for a bracket match.
+
+    Ties are a ResultError. Changing the winner of a match whose winner or
+    loser already plays on (or got a bye) is a BracketError.
+    """
+    if len(set(scores.values())) < 2:
+        raise ResultError("Bracket matches can't end in a tie")
+    bracket = _locked(match.bracket_id)
+    state = bracket.state
+    node = match.bracket_node
+    previous = state["winners"][node]
+    if previous is None or previous == max(scores, key=scores.get):
+        return
+    lay = layout(bracket.format, bracket.size)
+    if node == lay.grand_final:
+        # a reset decided by a bye can be undone; a scheduled one can't
+        if state["matches"][lay.reset] is not None:
+            raise BracketError("a later bracket match already depends on this result")
+        return
+    for target in (lay.winner_to[node], lay.loser_to[node]):
+        if target and (state["matches"][target[0]] is not None or state["winners"][target[0]] is not None):
+            raise BracketError("a later bracket match already depends on this result")
+
+
+def advance(match):
+    """Move the winner and loser of a completed bracket match on.
+
+    Call after ``check_result`` and ``assign_results``. Matches whose
+    players are now both known are created, dated like ``match``; their
+    ids are returned.
+    """
+    bracket = _locked(match.bracket_id)
+    lay = layout(bracket.format, bracket.size)
+    state = bracket.state
+    node = match.bracket_node
+    winner = next(mp.user_id for mp in match.match_players if mp.result == "win")
+    loser = next(mp.user_id for mp in match.match_players if mp.result == "loss")
+
+    previous = state["winners"][node]
+    if previous == winner:
+        return []
+    ready = []
+    if previous is None:
+        _decide(lay, state, node, winner, loser, ready)
+    elif node == lay.grand_final:
+        # check_result made sure the reset has no match yet
+        state["slots"][lay.reset] = [None, None]
+        state["winners"][lay.reset] = None
+        _decide(lay, state, node, winner, loser, ready)
+    else:
+        # a corrected result; check_result made sure nothing downstream started
+        state["winners"][node] = winner
+        for target, user in ((lay.winner_to[node], winner), (lay.loser_to[node], loser)):
+            if target:
+                state["slots"][target[0]][target[1]] = user
+    created = _create_matches(bracket, lay, ready, match.date)
+    flag_modified(bracket, "state")
+    return created
+
+
+def render(bracket):
+    """The whole bracket as JSON-ready data, from its one row.
+
+    ``nodes`` lists every node with its ``slots`` (user ids, 0 for a bye,
+    null until decided); ``players`` maps those user ids to names.
+    """
+    lay = layout(bracket.format, bracket.size)
+    state = bracket.state
+    user_ids = {uid for slots in state["slots"] for uid in slots if uid}
+    names = dict(
+        db.session.query(User.user_id, User.name).filter(User.user_id.in_(user_ids))
+    ) if user_ids else {}
+    return {
+        "bracket_id": bracket.bracket_id,
+        "format": bracket.format,
+        "size": bracket.size,
+        "first_round": bracket.first_round,
+        "champion": state["winners"][lay.final] or None,
+        "players": names,
+        "nodes": [
+            {
+                "node": node,
+                "side": lay.side[node],
+                "round": lay.round[node],
+                "match_round": bracket.first_round - 1 + lay.wave[node],
+                "slots": state["slots"][node],
+                "winner": state["winners"][node],
+                "match_id": state["matches"][node],
+            }
+            for node in range(1, lay.nodes + 1)
+        ],
+    }
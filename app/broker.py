@@ -0,0 +1,225 @@
+"""Publish/subscribe of live event updates.
+
+``EventBroker`` is a Flask extension (instantiated in ``app.extensions``)
+that fans messages for one event out to every open stream of it. Messages
+are already-formatted Server-Sent Events text, so a publish is serialised
+once no matter how many spectators are connected.
+
+Backends are picked with ``EVENT_STREAM_BACKEND``:
+
+* ``memory`` (default): subscribers in this process only. Fine for a
+  single worker process.
+* ``redis``: publishes go through Redis pub/sub at
+  ``EVENT_STREAM_REDIS_URL`` (needs the optional ``redis`` package), so
+  writes handled by any worker reach streams held by all of them. Each
+  process keeps a single Redis subscription and fans out locally. If the
+  subscription fails it is logged and re-established with backoff, and
+  every local stream is told to resync for the updates it missed.
+* ``none``: live updates disabled.
+
+Each subscriber has a bounded queue (``EVENT_STREAM_MAX_QUEUE``). A client
+too slow to keep up has its backlog dropped and is told to resync instead
+of holding memory for it.
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+RESYNC = "event: resync\ndata: {}\n\n"
+
+log = logging.getLogger(__name__)
+
+
+class Subscription:
+    def __init__(self, broker, channel, max_queue):
+        self.broker = broker
+        self.channel = channel
+        self.max_queue = max_queue
+        self._messages = deque()
+        self._cond = threading.Condition()
+        self._lagged = False
+
+    def push(self, message):
+        with self._cond:
+            if len(self._messages) >= self.max_queue:
+                self._messages.clear()
+                self._lagged = True
+            else:
+                self._messages.append(message)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """The next message, RESYNC if messages were dropped, or None on timeout."""
+        with self._cond:
+            if not self._messages and not self._lagged:
+                self._cond.wait(timeout)
+            if self._lagged:
+                self._lagged = False
+                return RESYNC
+            return self._messages.popleft() if self._messages else None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class MemoryBroker:
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        sub = Subscription(self, channel, self.max_queue)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            sub.push(message)
+        return len(subs)
+
+    def publish_all(self, message):
+        """Send ``message`` to every subscriber of every channel."""
+        with self._lock:
+            subs = [sub for channel_subs in self._subscribers.values() for sub in channel_subs]
+        for sub in subs:
+            sub.push(message)
+        return len(subs)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subs) for subs in self._subscribers.values())
+
+
+class RedisBroker:
+    # seconds to wait before resubscribing after a Redis error, doubling
+    # after every failed attempt up to the maximum
+    RECONNECT_DELAY = 0.5
+    MAX_RECONNECT_DELAY = 30
+
+    def __init__(self, client, prefix="ttt:live:", max_queue=100):
+        self.client = client
+        self.prefix = prefix
+        self.local = MemoryBroker(max_queue)
+        self.reconnects = 0
+        self._listener = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("EVENT_STREAM_BACKEND=redis requires the 'redis' package") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _listen(self):
+        """Relay Redis messages to local subscribers for the life of the process.
+
+        A connection reset, failover or timeout must not end this thread:
+        every stream in the process would silently stop updating.
+        """
+        delay = self.RECONNECT_DELAY
+        while True:
+            pubsub = None
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                if self.reconnects:
+                    # whatever was published while we were away is lost
+                    self.local.publish_all(RESYNC)
+                delay = self.RECONNECT_DELAY
+                self._relay(pubsub)
+            except Exception:
+                log.exception("event stream subscription to Redis failed; retrying in %.1fs", delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+            time.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+            self.reconnects += 1
+
+    def _relay(self, pubsub):
+        for item in pubsub.listen():
+            if item.get("type") != "pmessage":
+                continue
+            channel = item["channel"]
+            data = item["data"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            data = data.decode() if isinstance(data, bytes) else data
+            self.local.publish(channel[len(self.prefix):], data)
+
+    def subscribe(self, channel):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="event-stream-redis", daemon=True)
+                self._listener.start()
+        return self.local.subscribe(channel)
+
+    def unsubscribe(self, sub):
+        self.local.unsubscribe(sub)
+
+    def publish(self, channel, message):
+        return self.client.publish(self.prefix + channel, message)
+
+    def subscriber_count(self):
+        return self.local.subscriber_count()
+
+
+class EventBroker:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.keepalive = 15
+        self.published = 0
+
+    def init_app(self, app):
+        kind = app.config.get("EVENT_STREAM_BACKEND", "memory")
+        max_queue = app.config.get("EVENT_STREAM_MAX_QUEUE", 100)
+        self.keepalive = app.config.get("EVENT_STREAM_KEEPALIVE", 15)
+        if kind == "memory":
+            self.backend = MemoryBroker(max_queue)
+        elif kind == "redis":
+            self.backend = RedisBroker.from_url(app.config["EVENT_STREAM_REDIS_URL"], max_queue=max_queue)
+        elif kind in ("none", "", None):
+            self.backend = None
+        else:
+            raise ValueError(f"unknown EVENT_STREAM_BACKEND {kind!r}")
+        app.extensions["event_broker"] = self
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    @staticmethod
+    def _channel(event_id):
+        return f"event:{event_id}"
+
+    def subscribe(self, event_id):
+        return self.backend.subscribe(self._channel(event_id))
+
+    def publish(self, event_id, message):
+        if self.backend is not None:
+            self.backend.publish(self._channel(event_id), message)
+            self.published += 1
+
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "subscribers": self.backend.subscriber_count() if self.backend else 0,
+            "published": self.published,
+        }
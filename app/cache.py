@@ -0,0 +1,127 @@
+"""Server-side cache for serialized response payloads.
+
+``ResponseCache`` is a Flask extension (instantiated in ``app.extensions``)
+that stores one payload per event together with the event version it was
+built from. Readers pass the current version and get a miss when the
+stored copy is older, so a stale payload is never served even if an
+invalidation was missed; writes still delete the entry right away so the
+memory is released.
+
+Backends are picked with ``RESPONSE_CACHE_BACKEND``:
+
+* ``memory`` (default): a thread-safe in-process LRU of
+  ``RESPONSE_CACHE_MAX_ENTRIES`` payloads.
+* ``redis``: any Redis-compatible server at ``RESPONSE_CACHE_REDIS_URL``
+  (needs the optional ``redis`` package). ``RedisBackend`` only calls
+  ``get``/``set``/``delete`` on its client, so tests can pass in a fake.
+* ``none``: caching disabled.
+"""
+from collections import OrderedDict
+from threading import Lock
+
+
+class MemoryBackend:
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    def __init__(self, client, prefix="ttt:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+class ResponseCache:
+    def __init__(self, backend=None):
+        self.backend = backend
+        self.ttl = None
+        self.hits = 0
+        self.misses = 0
+
+    def init_app(self, app):
+        kind = app.config.get("RESPONSE_CACHE_BACKEND", "memory")
+        self.ttl = app.config.get("RESPONSE_CACHE_TTL") or None
+        if kind == "memory":
+            self.backend = MemoryBackend(app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 256))
+        elif kind == "redis":
+            self.backend = RedisBackend.from_url(app.config["RESPONSE_CACHE_REDIS_URL"])
+        elif kind in ("none", "", None):
+            self.backend = None
+        else:
+            raise ValueError(f"unknown RESPONSE_CACHE_BACKEND {kind!r}")
+        app.extensions["response_cache"] = self
+
+    @staticmethod
+    def _event_key(event_id):
+        return f"event:{event_id}"
+
+    def get_event(self, event_id, version):
+        """The cached payload for ``event_id`` at ``version``, or None."""
+        if self.backend is None:
+            return None
+        value = self.backend.get(self._event_key(event_id))
+        if value is not None:
+            stored_version, _, body = value.partition(b"\n")
+            if int(stored_version) == version:
+                self.hits += 1
+                return body
+        self.misses += 1
+        return None
+
+    def set_event(self, event_id, version, body):
+        if self.backend is not None:
+            self.backend.set(self._event_key(event_id), b"%d\n" % version + body, self.ttl)
+
+    def invalidate_event(self, event_id):
+        if self.backend is not None:
+            self.backend.delete(self._event_key(event_id))
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__ if self.backend else None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
@@ -0,0 +1,109 @@
+"""HTTP caching for read endpoints.
+
+Events and matches carry a version counter that every write bumps. Read
+endpoints derive a strong ETag from it, so a conditional GET whose
+If-None-Match still matches is answered with 304 after one cheap version
+lookup, before the view's heavy queries run. The same version keys the
+server-side payload cache (``app.extensions.cache``), which writes
+invalidate through ``touch_event``.
+"""
+import hashlib
+from functools import wraps
+from flask import abort, current_app, g, make_response, request
+from app.extensions import cache, db
+from app.models import Event, EventRole, Match
+
+# responses are per-user (JWT cookie) and must be revalidated on every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def touch_event(event_id):
+    """Bump an event's version so ETags and cached payloads for it go stale."""
+    db.session.execute(
+        db.update(Event)
+        .where(Event.event_id == event_id)
+        .values(version=Event.version + 1)
+    )
+    g.pop("_event_versions", None)
+    cache.invalidate_event(event_id)
+
+
+def touch_user_events(user_id):
+    """Bump every event a user takes part in, e.g. after they change their name."""
+    event_ids = [
+        eid for (eid,) in db.session.query(EventRole.event_id)
+        .filter(EventRole.user_id == user_id)
+        .distinct()
+    ]
+    db.session.execute(
+        db.update(Event)
+        .where(Event.event_id.in_(event_ids))
+        .values(version=Event.version + 1)
+    )
+    g.pop("_event_versions", None)
+    for event_id in event_ids:
+        cache.invalidate_event(event_id)
+
+
+def event_version(event_id):
+    """Current version of an event (404 if missing), looked up once per request."""
+    versions = g.setdefault("_event_versions", {})
+    if event_id not in versions:
+        version = db.session.query(Event.version).filter(Event.event_id == event_id).scalar()
+        if version is None:
+            abort(404)
+        versions[event_id] = version
+    return versions[event_id]
+
+
+def event_etag(event_id):
+    return f"event-{event_id}-v{event_version(event_id)}"
+
+
+def match_etag(match_id):
+    """Match payloads include event data (admins, names), so both versions count."""
+    versions = (
+        db.session.query(Match.version, Event.version)
+        .join(Event, Event.event_id == Match.event_id)
+        .filter(Match.match_id == match_id)
+        .first()
+    )
+    if versions is None:
+        abort(404)
+    return f"match-{match_id}-v{versions[0]}-e{versions[1]}"
+
+
+def _tag(response, etag):
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def conditional(etag_fn=None):
+    """Serve a GET view with an ETag and answer matching If-None-Match with 304.
+
+    ``etag_fn`` receives the view's URL arguments and returns the ETag
+    without running the view. Without it the ETag is a hash of the
+    response body, which saves bandwidth but not the work of building it.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if etag_fn is not None:
+                etag = etag_fn(**kwargs)
+                if request.if_none_match.contains(etag):
+                    return _tag(current_app.response_class(status=304), etag)
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code == 200:
+                    _tag(response, etag)
+                return response
+
+            response = make_response(fn(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            etag = hashlib.sha1(response.get_data()).hexdigest()
+            if request.if_none_match.contains(etag):
+                return _tag(current_app.response_class(status=304), etag)
+            return _tag(response, etag)
+        return wrapper
+    return decorator
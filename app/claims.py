@@ -0,0 +1,43 @@
+"""Claim tokens for placeholder accounts.
+
+An event import creates a placeholder account (``PLACEHOLDER_PW``) for
+every email it doesn't know. Nobody can log in as one, and registering
+with its email is refused like for any other taken email unless the
+request carries a claim token. An operator issues one with
+``flask users claim-token <email>`` and sends it to that address, so
+whoever presents it has shown they can read that inbox.
+
+Tokens are signed with ``SECRET_KEY``, expire after
+``CLAIM_TOKEN_MAX_AGE`` seconds and stop working once the account has
+been claimed.
+"""
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.extensions import db
+from app.models import User
+
+SALT = "claim-placeholder"
+
+
+def _serializer():
+    return URLSafeTimedSerializer(current_app.config["SECRET_KEY"], salt=SALT)
+
+
+def claim_token(user):
+    """A token handing the placeholder ``user`` to whoever registers with it."""
+    return _serializer().dumps({"user_id": user.user_id, "email": user.email})
+
+
+def claimed_user(token, email):
+    """The placeholder that ``token`` hands over to ``email``, or None if the
+    token is forged, expired, for another email or already used."""
+    try:
+        data = _serializer().loads(token, max_age=current_app.config["CLAIM_TOKEN_MAX_AGE"])
+    except BadSignature:
+        return None
+    if not isinstance(data, dict) or data.get("email") != email:
+        return None
+    user = db.session.get(User, data.get("user_id"))
+    if user is None or user.email != email or not user.is_placeholder:
+        return None
+    return user
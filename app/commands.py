@@ -0,0 +1,74 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import Event, User
+from app import claims, ratings, standings
+from app.archive import ArchiveError, import_event
+
+standings_cli = AppGroup("standings", help="Maintain the persisted event standings.")
+events_cli = AppGroup("events", help="Import and export whole events.")
+ratings_cli = AppGroup("ratings", help="Maintain player ratings.")
+users_cli = AppGroup("users", help="Manage user accounts.")
+
+
+@standings_cli.command("rebuild")
+@click.option("--event-id", type=int, default=None, help="Only rebuild this event.")
+def rebuild_standings(event_id):
+    """Recompute standings from match history, e.g. after a manual data fix."""
+    if event_id is not None:
+        event_ids = [event_id]
+    else:
+        event_ids = [eid for (eid,) in db.session.query(Event.event_id).order_by(Event.event_id)]
+
+    for eid in event_ids:
+        count = standings.rebuild(eid)
+        db.session.commit()
+        click.echo(f"event {eid}: rebuilt {count} standings")
+
+
+@events_cli.command("import")
+@click.argument("archive", type=click.File("rb"))
+@click.option("--name", default=None, help="Name for the new event instead of the archived one.")
+def import_event_archive(archive, name):
+    """Create a new event from a JSON Lines export (GET /api/events/<id>/export)."""
+    try:
+        summary = import_event(archive, name=name)
+    except ArchiveError as e:
+        db.session.rollback()
+        raise click.ClickException(str(e))
+    except IntegrityError:
+        db.session.rollback()
+        raise click.ClickException("archive has duplicate players or roles")
+    db.session.commit()
+
+    counts = ", ".join(f"{n} {kind}" for kind, n in summary["counts"].items())
+    click.echo(f"event {summary['event_id']}: imported {counts}")
+    click.echo(f"{summary['rows']} rows in {summary['seconds']:.2f}s ({summary['rows_per_sec']} rows/sec)")
+
+
+@ratings_cli.command("recompute")
+def recompute_ratings():
+    """Replay every completed match and replace all player ratings."""
+    summary = ratings.recompute()
+    db.session.commit()
+    click.echo(
+        f"rated {summary['players']} players over {summary['matches']} matches "
+        f"in {summary['seconds']:.2f}s ({summary['engine']}, replay {summary['replay_seconds']:.2f}s)"
+    )
+
+
+@users_cli.command("claim-token")
+@click.argument("email")
+def issue_claim_token(email):
+    """Print a token that lets the owner of EMAIL claim its imported placeholder.
+
+    Send it to that address only; they pass it as ``claim_token`` when
+    registering (POST /api/users/).
+    """
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f"no user with email {email}")
+    if not user.is_placeholder:
+        raise click.ClickException(f"{email} is already a registered account")
+    click.echo(claims.claim_token(user))
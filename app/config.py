@@ -5,6 +5,24 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///dev.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # connection pool for server databases (see app.database)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    # recycle connections before MySQL's wait_timeout closes them server side
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # read replicas for @read_only views (comma separated URLs), and how long
+    # a client that wrote keeps reading from the primary
+    DATABASE_REPLICA_URLS = [u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+    READ_YOUR_WRITES_SECONDS = int(os.getenv("READ_YOUR_WRITES_SECONDS", "10"))
+
+    # SQLite file databases: WAL journal, busy timeout and page cache size
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+    SQLITE_CACHE_KB = int(os.getenv("SQLITE_CACHE_KB", "20000"))
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "dev-jwt-secret")
 
     JWT_TOKEN_LOCATION = ["cookies"]
@@ -21,3 +39,50 @@ class Config:
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:5173").split(",")
 
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(days=7)
+
+    # seconds a user's event roles stay cached in-process (0 disables)
+    EVENT_ROLE_CACHE_TTL = int(os.getenv("EVENT_ROLE_CACHE_TTL", "10"))
+
+    # server-side cache of serialized event payloads: memory, redis or none
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+
+    # bcrypt cost for new hashes; logins rehash passwords stored with another cost
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+    # processes hashing passwords off the request thread (0 hashes inline)
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(os.cpu_count() or 1, 4))))
+    # hashes allowed to be queued or running at once, and how long a request
+    # waits for a slot before getting a 503
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv("PASSWORD_HASH_QUEUE_TIMEOUT", "5"))
+
+    # request timing: statements slower than this are logged to "app.sql",
+    # Server-Timing headers on responses, and the bearer token required to
+    # read /metrics and the /health details (only debug and testing apps
+    # serve them without one)
+    SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "200"))
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+    # bearer token for POST /api/events/import; the endpoint is off while unset
+    IMPORT_TOKEN = os.getenv("IMPORT_TOKEN", "")
+    # seconds a claim token for an imported placeholder account stays valid
+    CLAIM_TOKEN_MAX_AGE = int(os.getenv("CLAIM_TOKEN_MAX_AGE", str(7 * 24 * 3600)))
+
+    # tiebreakers ranking players with equal records, in order (see app.tiebreaks):
+    # any of buchholz, sonneborn_berger, owp; empty lets them share a rank
+    LEADERBOARD_TIEBREAKS = os.getenv("LEADERBOARD_TIEBREAKS", "")
+
+    # player ratings (see app.ratings): Elo K-factor and Glicko-2 system constant
+    RATING_ELO_K = float(os.getenv("RATING_ELO_K", "32"))
+    RATING_GLICKO_TAU = float(os.getenv("RATING_GLICKO_TAU", "0.5"))
+
+    # live event updates over Server-Sent Events: memory, redis or none
+    EVENT_STREAM_BACKEND = os.getenv("EVENT_STREAM_BACKEND", "memory")
+    EVENT_STREAM_REDIS_URL = os.getenv("EVENT_STREAM_REDIS_URL", "redis://localhost:6379/0")
+    # messages buffered per slow client before it is told to resync
+    EVENT_STREAM_MAX_QUEUE = int(os.getenv("EVENT_STREAM_MAX_QUEUE", "100"))
+    # seconds between keepalive comments on idle streams
+    EVENT_STREAM_KEEPALIVE = int(os.getenv("EVENT_STREAM_KEEPALIVE", "15"))
@@ -0,0 +1,128 @@
+"""Engine and connection pool setup.
+
+Pool settings come from the ``DB_POOL_*`` config values (environment
+driven, see ``app.config``) and are applied to server databases. Any key
+already in ``SQLALCHEMY_ENGINE_OPTIONS`` wins. ``pool_pre_ping`` and
+``pool_recycle`` keep MySQL's idle timeout from handing out dead
+connections.
+
+SQLite files are switched to WAL mode with a busy timeout, so readers
+don't block the writer and concurrent writers wait instead of failing
+with "database is locked".
+
+``PoolMetrics`` counts pool events per engine for ``/health``.
+"""
+import threading
+from functools import partial
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from app.extensions import db
+
+
+def engine_options(config, url=None):
+    """SQLALCHEMY_ENGINE_OPTIONS for the database URL (the primary's by default)."""
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    url = make_url(url or config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options.setdefault("pool_size", config["DB_POOL_SIZE"])
+    options.setdefault("max_overflow", config["DB_MAX_OVERFLOW"])
+    options.setdefault("pool_timeout", config["DB_POOL_TIMEOUT"])
+    options.setdefault("pool_recycle", config["DB_POOL_RECYCLE"])
+    options.setdefault("pool_pre_ping", config["DB_POOL_PRE_PING"])
+    return options
+
+
+def sqlite_pragmas(config):
+    pragmas = {
+        "busy_timeout": config["SQLITE_BUSY_TIMEOUT_MS"],
+        "cache_size": -config["SQLITE_CACHE_KB"],
+        "temp_store": "MEMORY",
+    }
+    if config["SQLITE_WAL"]:
+        pragmas["journal_mode"] = "WAL"
+        # durable at every checkpoint, and much cheaper per commit under WAL
+        pragmas["synchronous"] = "NORMAL"
+    return pragmas
+
+
+def _set_pragmas(pragmas, dbapi_connection, _record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+class PoolMetrics:
+    """Connection pool counters for one engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self.invalidated = 0
+        self._lock = threading.Lock()
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, *_args):
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, *_args):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, *_args):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def _on_invalidate(self, *_args):
+        with self._lock:
+            self.invalidated += 1
+
+    def stats(self):
+        pool = self.engine.pool
+        stats = {
+            "pool": type(pool).__name__,
+            "checked_out": self.checked_out,
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "connects": self.connects,
+            "invalidated": self.invalidated,
+        }
+        if hasattr(pool, "size") and hasattr(pool, "overflow"):
+            stats.update(size=pool.size(), idle=pool.checkedin(), overflow=pool.overflow())
+        return stats
+
+
+def all_engines(app):
+    """The app's engines by name: ``default``, other binds and the replicas."""
+    with app.app_context():
+        engines = {bind or "default": engine for bind, engine in db.engines.items()}
+    engines.update(app.extensions.get("db_replica_engines", {}))
+    return engines
+
+
+def init_engines(app):
+    """Tune SQLite connections and start counting pool events for every engine."""
+    pragmas = sqlite_pragmas(app.config)
+    metrics = {}
+    for name, engine in all_engines(app).items():
+        if engine.dialect.name == "sqlite" and engine.url.database not in (None, "", ":memory:"):
+            event.listen(engine, "connect", partial(_set_pragmas, pragmas))
+        metrics[name] = PoolMetrics(engine)
+    app.extensions["db_pool_metrics"] = metrics
+
+
+def pool_stats(app):
+    return {bind: m.stats() for bind, m in app.extensions.get("db_pool_metrics", {}).items()}
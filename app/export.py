@@ -0,0 +1,170 @@
+"""Streaming export of a whole event.
+
+Every query here runs with ``yield_per`` (which also asks the driver for a
+server-side cursor where it has one), and records are serialised as they
+are read, so memory use stays flat no matter how many matches an event
+has. Matches and their players come from a single query ordered by
+match, so one cursor is open at a time, which MySQL's unbuffered cursors
+require.
+
+JSON Lines records carry a ``type`` field and come in dependency order:
+``event``, ``user``, ``player``, ``role``, ``match`` (with its
+``players``) and ``standing``. Users are written with their email so an
+export can be matched up with the accounts of another database.
+"""
+import csv
+import io
+import json
+from itertools import groupby
+from sqlalchemy import select, union
+from app.extensions import db
+from app.models import EventPlayer, EventRole, Match, MatchPlayer, Standing, User
+
+EXPORT_FORMAT = "tabletoptracker-event"
+EXPORT_VERSION = 1
+
+# rows fetched per round trip while streaming
+EXPORT_CHUNK_SIZE = 1000
+
+# CSV exports are one table at a time
+CSV_TABLES = {
+    "matches": ["match_id", "round", "date", "status", "user_id", "name", "score", "result"],
+    "players": ["user_id", "name", "email", "score"],
+    "standings": ["rank", "user_id", "name", "wins", "losses", "ties", "score"],
+}
+
+
+def _stream(stmt):
+    return db.session.execute(stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE))
+
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def event_records(event):
+    """Yield every record of ``event`` as a plain dict."""
+    event_id = event.event_id
+    yield {
+        "type": "event",
+        "format": EXPORT_FORMAT,
+        "version": EXPORT_VERSION,
+        "event_id": event_id,
+        "name": event.name,
+        "start_date": _iso(event.start_date),
+        "end_date": _iso(event.end_date),
+    }
+
+    user_ids = union(
+        select(EventPlayer.user_id).where(EventPlayer.event_id == event_id),
+        select(EventRole.user_id).where(EventRole.event_id == event_id),
+        select(MatchPlayer.user_id)
+        .join(Match, Match.match_id == MatchPlayer.match_id)
+        .where(Match.event_id == event_id),
+    )
+    users = select(User.user_id, User.name, User.email).where(User.user_id.in_(user_ids)).order_by(User.user_id)
+    for user_id, name, email in _stream(users):
+        yield {"type": "user", "user_id": user_id, "name": name, "email": email}
+
+    players = select(EventPlayer.user_id, EventPlayer.score).where(EventPlayer.event_id == event_id).order_by(EventPlayer.ep_id)
+    for user_id, score in _stream(players):
+        yield {"type": "player", "user_id": user_id, "score": score}
+
+    roles = select(EventRole.user_id, EventRole.role).where(EventRole.event_id == event_id).order_by(EventRole.eo_id)
+    for user_id, role in _stream(roles):
+        yield {"type": "role", "user_id": user_id, "role": role}
+
+    match_rows = (
+        select(
+            Match.match_id, Match.round, Match.date, Match.status,
+            MatchPlayer.user_id, MatchPlayer.score, MatchPlayer.result,
+        )
+        .outerjoin(MatchPlayer, MatchPlayer.match_id == Match.match_id)
+        .where(Match.event_id == event_id)
+        .order_by(Match.match_id, MatchPlayer.mp_id)
+    )
+    for (match_id, round_num, match_date, status), rows in groupby(_stream(match_rows), key=lambda r: r[:4]):
+        yield {
+            "type": "match",
+            "match_id": match_id,
+            "round": round_num,
+            "date": _iso(match_date),
+            "status": status,
+            "players": [
+                {"user_id": user_id, "score": score, "result": result}
+                for *_match, user_id, score, result in rows
+                if user_id is not None
+            ],
+        }
+
+    ranked = (
+        select(Standing.user_id, Standing.wins, Standing.losses, Standing.ties, Standing.score, Standing.rank)
+        .where(Standing.event_id == event_id)
+        .order_by(Standing.rank, Standing.user_id)
+    )
+    for user_id, wins, losses, ties, score, rank in _stream(ranked):
+        yield {
+            "type": "standing", "user_id": user_id, "rank": rank,
+            "wins": wins, "losses": losses, "ties": ties, "score": score,
+        }
+
+
+def csv_rows(event_id, table):
+    """Yield the header and rows of one CSV table of an event."""
+    yield CSV_TABLES[table]
+    if table == "matches":
+        stmt = (
+            select(Match.match_id, Match.round, Match.date, Match.status,
+                   MatchPlayer.user_id, User.name, MatchPlayer.score, MatchPlayer.result)
+            .join(MatchPlayer, MatchPlayer.match_id == Match.match_id)
+            .join(User, User.user_id == MatchPlayer.user_id)
+            .where(Match.event_id == event_id)
+            .order_by(Match.match_id, MatchPlayer.mp_id)
+        )
+    elif table == "players":
+        stmt = (
+            select(EventPlayer.user_id, User.name, User.email, EventPlayer.score)
+            .join(User, User.user_id == EventPlayer.user_id)
+            .where(EventPlayer.event_id == event_id)
+            .order_by(EventPlayer.ep_id)
+        )
+    else:
+        stmt = (
+            select(Standing.rank, Standing.user_id, User.name,
+                   Standing.wins, Standing.losses, Standing.ties, Standing.score)
+            .join(User, User.user_id == Standing.user_id)
+            .where(Standing.event_id == event_id)
+            .order_by(Standing.rank, Standing.user_id)
+        )
+    yield from _stream(stmt)
+
+
+def _chunks(lines, size=EXPORT_CHUNK_SIZE):
+    """Join lines into larger strings so the server writes fewer, bigger chunks."""
+    buf = []
+    for line in lines:
+        buf.append(line)
+        if len(buf) >= size:
+            yield "".join(buf)
+            buf.clear()
+    if buf:
+        yield "".join(buf)
+
+
+def jsonl_stream(event):
+    return _chunks(json.dumps(record, separators=(",", ":")) + "\n" for record in event_records(event))
+
+
+def csv_stream(event_id, table):
+    out = io.StringIO()
+    writer = csv.writer(out)
+
+    def lines():
+        for row in csv_rows(event_id, table):
+            writer.writerow(row)
+            line = out.getvalue()
+            out.seek(0)
+            out.truncate()
+            yield line
+
+    return _chunks(lines())
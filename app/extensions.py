@@ -5,10 +5,19 @@ from flask_cors import CORS
 from flask_marshmallow import Marshmallow
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from .broker import EventBroker
+from .cache import ResponseCache
+from .metrics import RequestMetrics
+from .passwords import PasswordHasher
+from .routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 migrate = Migrate()
 jwt = JWTManager()
 cors = CORS()
 ma = Marshmallow()
 limiter = Limiter(key_func=get_remote_address)
+cache = ResponseCache()
+password_hasher = PasswordHasher()
+broker = EventBroker()
+metrics = RequestMetrics()
@@ -0,0 +1,108 @@
+"""Live updates for event pages over Server-Sent Events.
+
+Writes publish small deltas through ``app.extensions.broker`` once they
+are committed, and ``GET /api/events/<id>/stream`` relays them to
+spectators. The event kinds are:
+
+* ``hello``: sent on connect with the event's current version.
+* ``matches``: ``{"matches": [...]}`` new or updated matches, shaped like
+  the ``matches`` of ``GET /api/events/<id>``.
+* ``match_deleted``: ``{"match_id": ...}``.
+* ``standings``: ``{"rows": [...]}`` leaderboard rows whose record or
+  rank changed (without ``name``, which a result never changes).
+* ``refresh``: bulk changes such as a generated round or a roster
+  import; clients re-fetch the event, which the payload cache serves
+  cheaply.
+* ``resync``: this client fell behind and lost messages; re-fetch.
+
+Every payload carries the event ``version`` after the change. A client
+that reconnects and sees a different version in ``hello`` knows it
+missed something.
+"""
+import json
+from app.extensions import broker
+from app.caching import event_version
+
+# milliseconds a disconnected EventSource waits before reconnecting
+RETRY_MS = 3000
+
+
+def sse(kind, data):
+    return f"event: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def notify(event_id, kind, data=None):
+    """Push a delta to everyone watching an event. Call after committing."""
+    if not broker.enabled:
+        return
+    payload = dict(data or {})
+    payload["version"] = event_version(event_id)
+    broker.publish(event_id, sse(kind, payload))
+
+
+def stream(subscription, version, keepalive):
+    """Yield the SSE body for one subscriber until the client goes away."""
+    try:
+        yield f"retry: {RETRY_MS}\n\n" + sse("hello", {"version": version})
+        while True:
+            message = subscription.get(timeout=keepalive)
+            # comments keep proxies from timing out idle connections and
+            # let the server notice clients that have left
+            yield message if message is not None else ": keepalive\n\n"
+    finally:
+        subscription.close()
+
+
+def match_summary(m):
+    """A match as listed in the event payload; players must be loaded with their users."""
+    match_players = [
+        {
+            "user_id": mp.user.user_id,
+            "name": mp.user.name,
+            "score": mp.score,
+            "result": mp.result,
+        }
+        for mp in m.match_players
+    ]
+
+    result_label = "TBD"
+    if len(match_players) == 2:
+        s1, s2 = match_players[0]["score"], match_players[1]["score"]
+        if s1 > s2:
+            result_label = match_players[0]["name"] + " W " + str(match_players[0]["score"]) + "-" + str(match_players[1]["score"])
+        elif s2 > s1:
+            result_label = match_players[1]["name"] + " W" + str(match_players[1]["score"]) + "-" + str(match_players[0]["score"])
+        else:
+            result_label = "T" + str(match_players[0]["score"]) + "-" + str(match_players[1]["score"])
+
+    team1_name = match_players[0]["name"] if len(match_players) > 0 else "TBD"
+    team2_name = match_players[1]["name"] if len(match_players) > 1 else "TBD"
+    team1_score = match_players[0]["score"] if len(match_players) > 0 else None
+    team2_score = match_players[1]["score"] if len(match_players) > 1 else None
+
+    return {
+        "match_id": m.match_id,
+        "match_title": f"{team1_name} vs. {team2_name}",
+        "team1_name": team1_name,
+        "team2_name": team2_name,
+        "team1_score": team1_score,
+        "team2_score": team2_score,
+        "date_played": m.date.isoformat() if m.date else None,
+        "status": m.status,
+        "result_label": result_label
+    }
+
+
+def standing_rows(rows):
+    """Leaderboard delta rows for Standing objects, one per user."""
+    by_user = {}
+    for s in rows:
+        by_user[s.user_id] = {
+            "user_id": s.user_id,
+            "wins": s.wins,
+            "losses": s.losses,
+            "ties": s.ties,
+            "score": s.score,
+            "rank": s.rank,
+        }
+    return list(by_user.values())
@@ -0,0 +1,223 @@
+"""Per-request performance metrics.
+
+``RequestMetrics`` is a Flask extension (instantiated in ``app.extensions``)
+that times every request:
+
+* SQL statement count and time, from cursor events on every engine
+  (primary and replicas);
+* JSON serialization time, from a timing ``app.json`` provider;
+* handler wall time, from ``before_request`` to ``after_request``. For
+  streamed responses this is the time to the first byte.
+
+Each response gets a ``Server-Timing`` header (shown in the browser's
+network panel) and the numbers feed per-route histograms served by
+``/metrics`` in the Prometheus text format, alongside the counters from
+``/health``. Statements slower than ``SLOW_QUERY_MS`` are logged to the
+``app.sql`` logger with the route that ran them.
+"""
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from flask import current_app, g, has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+slow_query_log = logging.getLogger("app.sql")
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# characters of a slow statement written to the log
+SLOW_QUERY_SNIPPET = 500
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {_number(self.sum)}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """``jsonify`` that adds its serialization time to the current request."""
+
+    def dumps(self, obj, **kwargs):
+        if not has_request_context():
+            return super().dumps(obj, **kwargs)
+        start = time.perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            g._serialize_seconds = g.get("_serialize_seconds", 0) + time.perf_counter() - start
+
+
+class RequestMetrics:
+    HISTOGRAMS = {
+        "ttt_request_duration_seconds": ("Handler wall time", DURATION_BUCKETS),
+        "ttt_request_sql_seconds": ("SQL time per request", DURATION_BUCKETS),
+        "ttt_request_sql_queries": ("SQL statements per request", QUERY_BUCKETS),
+        "ttt_request_serialize_seconds": ("JSON serialization time per request", DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self.slow_query_seconds = 0.2
+        self.server_timing = True
+        self.token = None
+        self._histograms = {}
+        self._requests = {}
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+        self._gauges = []
+
+    def init_app(self, app, engines=()):
+        """Instrument ``app`` and the given SQLAlchemy engines."""
+        self.slow_query_seconds = app.config.get("SLOW_QUERY_MS", 200) / 1000
+        self.server_timing = app.config.get("SERVER_TIMING", True)
+        self.token = app.config.get("METRICS_TOKEN") or None
+        self._gauges = []
+
+        app.json = TimedJSONProvider(app)
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+            event.listen(engine, "handle_error", self._failed)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.extensions["request_metrics"] = self
+
+    def add_gauges(self, prefix, stats, label="name"):
+        """Also export ``stats()`` as gauges; nested dicts are told apart by ``label``."""
+        self._gauges.append((prefix, stats, label))
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_query_start"].pop()
+        if not has_request_context():
+            return
+        g._sql_queries = g.get("_sql_queries", 0) + 1
+        g._sql_seconds = g.get("_sql_seconds", 0) + elapsed
+        if elapsed >= self.slow_query_seconds:
+            with self._lock:
+                self.slow_queries += 1
+            slow_query_log.warning(
+                "slow query %.1fms in %s %s: %s",
+                elapsed * 1000, request.method, _route(), " ".join(statement.split())[:SLOW_QUERY_SNIPPET],
+            )
+
+    def _failed(self, context):
+        starts = context.connection.info.get("_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    def _start(self):
+        g._request_start = time.perf_counter()
+
+    def _finish(self, response):
+        start = g.get("_request_start")
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        queries = g.get("_sql_queries", 0)
+        sql = g.get("_sql_seconds", 0)
+        serialize = g.get("_serialize_seconds", 0)
+
+        labels = f'method="{request.method}",route="{_route()}"'
+        with self._lock:
+            for name, value in (
+                ("ttt_request_duration_seconds", total),
+                ("ttt_request_sql_seconds", sql),
+                ("ttt_request_sql_queries", queries),
+                ("ttt_request_serialize_seconds", serialize),
+            ):
+                histogram = self._histograms.get((name, labels))
+                if histogram is None:
+                    histogram = self._histograms[(name, labels)] = Histogram(self.HISTOGRAMS[name][1])
+                histogram.observe(value)
+            key = f'{labels},status="{response.status_code}"'
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+        if self.server_timing:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={sql * 1000:.2f};desc="{queries} queries", '
+                f"serialize;dur={serialize * 1000:.2f}, total;dur={total * 1000:.2f}",
+            )
+        return response
+
+    def authorized(self):
+        """Whether the request may read ``/metrics`` and the ``/health``
+        details: it has to carry ``METRICS_TOKEN``, which only debug and
+        testing apps may leave unset."""
+        if self.token is None:
+            return current_app.debug or current_app.testing
+        return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {self.token}")
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            requests = sorted(self._requests.items())
+            slow_queries = self.slow_queries
+
+        lines += ["# HELP ttt_requests_total Requests handled", "# TYPE ttt_requests_total counter"]
+        lines += [f"ttt_requests_total{{{labels}}} {n}" for labels, n in requests]
+        for name, (help_text, _buckets) in self.HISTOGRAMS.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+            for (hist_name, labels), histogram in histograms:
+                if hist_name == name:
+                    lines += histogram.lines(name, labels)
+        lines += [
+            "# HELP ttt_slow_queries_total Statements slower than SLOW_QUERY_MS",
+            "# TYPE ttt_slow_queries_total counter",
+            f"ttt_slow_queries_total {slow_queries}",
+        ]
+
+        for prefix, stats, label in self._gauges:
+            lines += _gauges(prefix, stats(), label)
+        return "\n".join(lines) + "\n"
+
+
+def _route():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(int(value))
+
+
+def _gauges(prefix, stats, label):
+    """Numeric entries of a stats dict as gauges; nested dicts become a label."""
+    by_name = {}
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            for name, v in value.items():
+                if isinstance(v, (int, float)) and not isinstance(v, bool):
+                    by_name.setdefault(f"{prefix}_{name}", []).append((f'{{{label}="{key}"}}', v))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            by_name.setdefault(f"{prefix}_{key}", []).append(("", value))
+
+    lines = []
+    for name, samples in by_name.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines += [f"{name}{labels} {_number(v)}" for labels, v in samples]
+    return lines
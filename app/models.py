@@ -1,7 +1,8 @@
-from .extensions import db
-from passlib.context import CryptContext
+from .extensions import db, password_hasher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# password of accounts created for unknown emails by an event import; it
+# never matches a login, and the account is claimed with a token (app.claims)
+PLACEHOLDER_PW = "!"
 
 class User(db.Model):
     __tablename__ = "users"
@@ -17,10 +18,18 @@ class User(db.Model):
     match_players = db.relationship("MatchPlayer", back_populates="user")
 
     def set_password(self, password):
-        self.pw = pwd_context.hash(password)
+        self.pw = password_hasher.hash(password)
+
+    @property
+    def is_placeholder(self):
+        return self.pw == PLACEHOLDER_PW
 
     def check_password(self, password):
-        return pwd_context.verify(password, self.pw)
+        """Verify a password, upgrading the stored hash if the bcrypt cost has changed."""
+        ok, new_hash = password_hasher.verify_and_update(password, self.pw)
+        if ok and new_hash:
+            self.pw = new_hash
+        return ok
 
 
 class Event(db.Model):
@@ -30,15 +39,21 @@ class Event(db.Model):
     name = db.Column(db.String, nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=True)
+    # bumped on every change to the event's players, matches or results (see app.caching)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
 
     # relationships
     event_players = db.relationship("EventPlayer", back_populates="event", cascade="all, delete-orphan")
     event_roles = db.relationship("EventRole", back_populates="event", cascade="all, delete-orphan")
     matches = db.relationship("Match", back_populates="event", cascade="all, delete-orphan")
+    bracket = db.relationship("Bracket", back_populates="event", uselist=False, cascade="all, delete-orphan")
 
 
 class EventPlayer(db.Model):
     __tablename__ = "event_players"
+    __table_args__ = (
+        db.Index("uq_event_players_event_id_user_id", "event_id", "user_id", unique=True),
+    )
 
     ep_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), nullable=False)
@@ -48,10 +63,14 @@ class EventPlayer(db.Model):
     # relationships
     user = db.relationship("User", back_populates="event_players")
     event = db.relationship("Event", back_populates="event_players")
+    standing = db.relationship("Standing", back_populates="event_player", uselist=False, cascade="all, delete-orphan")
 
 
 class EventRole(db.Model):
     __tablename__ = "event_roles"
+    __table_args__ = (
+        db.Index("uq_event_roles_event_id_user_id_role", "event_id", "user_id", "role", unique=True),
+    )
 
     eo_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), nullable=False)
@@ -65,20 +84,33 @@ class EventRole(db.Model):
 
 class Match(db.Model):
     __tablename__ = "matches"
+    __table_args__ = (
+        db.Index("ix_matches_event_id_round", "event_id", "round"),
+    )
 
     match_id = db.Column(db.Integer, primary_key=True)
     event_id = db.Column(db.Integer, db.ForeignKey("events.event_id"), nullable=False)
     round = db.Column(db.Integer, nullable=False)
     date = db.Column(db.Date, nullable=False)
     status = db.Column(db.String, nullable=False)
+    # bumped whenever results are recorded for this match
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+    # set for elimination matches: the bracket and its node (see app.brackets)
+    bracket_id = db.Column(db.Integer, db.ForeignKey("brackets.bracket_id"), nullable=True)
+    bracket_node = db.Column(db.Integer, nullable=True)
 
     # relationships
     event = db.relationship("Event", back_populates="matches")
+    bracket = db.relationship("Bracket")
     match_players = db.relationship("MatchPlayer", back_populates="match")
 
 
 class MatchPlayer(db.Model):
     __tablename__ = "match_players"
+    __table_args__ = (
+        db.Index("ix_match_players_match_id", "match_id"),
+        db.Index("ix_match_players_user_id", "user_id"),
+    )
 
     mp_id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), nullable=False)
@@ -89,3 +121,61 @@ class MatchPlayer(db.Model):
     # relationships
     user = db.relationship("User", back_populates="match_players")
     match = db.relationship("Match", back_populates="match_players")
+
+
+class Standing(db.Model):
+    __tablename__ = "standings"
+    __table_args__ = (
+        db.Index("ix_standings_event_id_rank", "event_id", "rank"),
+    )
+
+    standing_id = db.Column(db.Integer, primary_key=True)
+    ep_id = db.Column(db.Integer, db.ForeignKey("event_players.ep_id"), unique=True, nullable=False)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.event_id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), nullable=False)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    ties = db.Column(db.Integer, nullable=False, default=0)
+    score = db.Column(db.Integer, nullable=False, default=0)
+    rank = db.Column(db.Integer, nullable=False, default=1)
+    # {tiebreaker: value} as of the last rerank, only while the record is shared
+    tiebreaks = db.Column(db.JSON, nullable=True)
+
+    # relationships
+    event_player = db.relationship("EventPlayer", back_populates="standing")
+    user = db.relationship("User")
+
+
+class Rating(db.Model):
+    """A user's Elo and Glicko-2 ratings across all events (see app.ratings)."""
+    __tablename__ = "ratings"
+
+    rating_id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.user_id"), unique=True, nullable=False)
+    elo = db.Column(db.Float, nullable=False, default=1500.0)
+    glicko = db.Column(db.Float, nullable=False, default=1500.0)
+    glicko_rd = db.Column(db.Float, nullable=False, default=350.0)
+    glicko_volatility = db.Column(db.Float, nullable=False, default=0.06)
+    # rated matches played
+    matches = db.Column(db.Integer, nullable=False, default=0)
+
+    # relationships
+    user = db.relationship("User")
+
+
+class Bracket(db.Model):
+    """An event's elimination bracket, stored as per-node arrays (see app.brackets)."""
+    __tablename__ = "brackets"
+
+    bracket_id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.Integer, db.ForeignKey("events.event_id"), unique=True, nullable=False)
+    format = db.Column(db.String, nullable=False)
+    # seats in the first round, a power of two
+    size = db.Column(db.Integer, nullable=False)
+    # event round the bracket's first matches are played in
+    first_round = db.Column(db.Integer, nullable=False)
+    # {"slots": [[a, b], ...], "winners": [...], "matches": [...]}, indexed by node
+    state = db.Column(db.JSON, nullable=False)
+
+    # relationships
+    event = db.relationship("Event", back_populates="bracket")
@@ -0,0 +1,258 @@
+"""Swiss-system pairing.
+
+Players are ordered by score group (highest points first, shuffled within a
+group) and paired top-down: each player takes the highest-ranked opponent
+still available that they have not met yet. When a score group has an odd
+number of players, its last player floats down into the next group. When
+the top-down choice leads to a dead end later in the list, a depth-first
+search backtracks over earlier choices until it finds a rematch-free
+pairing.
+
+Unpaired players are kept in a doubly linked list over array indices, so
+removing a pair and undoing it while backtracking are both O(1). A round
+without tricky dead ends costs O(players x rounds played).
+
+Late rounds of small events can defeat chronological backtracking. If the
+search runs out of steps, the greedy top-down pairing is completed into a
+maximum matching of the "have not played yet" graph (Edmonds' blossom
+algorithm), so a rematch-free round is still found whenever one exists.
+Only players the maximum matching cannot place get rematched.
+"""
+import random
+
+# candidate checks the backtracking search may spend before giving up and
+# falling back to greedy pairing that allows rematches
+MAX_SEARCH_STEPS = 200_000
+
+# how many bye candidates (lowest ranked first) to try before falling back
+MAX_BYE_CANDIDATES = 5
+
+
+def pair_key(p1, p2):
+    return (p1, p2) if p1 <= p2 else (p2, p1)
+
+
+def order_by_score(points, rng=random):
+    """Players sorted by points, highest first, in random order within a score group."""
+    groups = {}
+    for pid, pts in points.items():
+        groups.setdefault(pts, []).append(pid)
+    ordered = []
+    for pts in sorted(groups, reverse=True):
+        group = groups[pts]
+        rng.shuffle(group)
+        ordered.extend(group)
+    return ordered
+
+
+class _Links:
+    """Doubly linked list over positions 0..n-1 with a sentinel at n."""
+
+    def __init__(self, n):
+        self.end = n
+        self.nxt = list(range(1, n + 1)) + [0]
+        self.prv = [n] + list(range(n))
+
+    def first(self):
+        return self.nxt[self.end]
+
+    def remove(self, i):
+        self.nxt[self.prv[i]] = self.nxt[i]
+        self.prv[self.nxt[i]] = self.prv[i]
+
+    def restore(self, i):
+        # must be undone in reverse order of removal
+        self.nxt[self.prv[i]] = i
+        self.prv[self.nxt[i]] = i
+
+
+def _search(order, played, max_steps):
+    """Rematch-free pairing of ``order`` (even length), or None if none was found."""
+    links = _Links(len(order))
+    end = links.end
+    chosen = []
+    steps = 0
+
+    a = links.first()
+    after = a
+    while a != end:
+        c = links.nxt[after]
+        while c != end and pair_key(order[a], order[c]) in played:
+            c = links.nxt[c]
+            steps += 1
+        steps += 1
+        if steps > max_steps:
+            return None
+
+        if c == end:
+            # no opponent left for a: undo the previous pair and try its next candidate
+            if not chosen:
+                return None
+            a, c = chosen.pop()
+            links.restore(c)
+            links.restore(a)
+            after = c
+            continue
+
+        links.remove(a)
+        links.remove(c)
+        chosen.append((a, c))
+        a = links.first()
+        after = a
+
+    return [(order[a], order[c]) for a, c in chosen]
+
+
+def _greedy_match(order, played):
+    """Top-down rematch-free pairing; players left without an opponent stay at -1."""
+    n = len(order)
+    links = _Links(n)
+    end = links.end
+    match = [-1] * n
+    a = links.first()
+    while a != end:
+        links.remove(a)
+        c = links.first()
+        while c != end and pair_key(order[a], order[c]) in played:
+            c = links.nxt[c]
+        if c != end:
+            links.remove(c)
+            match[a], match[c] = c, a
+        a = links.first()
+    return match
+
+
+class _Blossom:
+    """Edmonds' maximum matching on the implicit graph of allowed pairings.
+
+    Neighbours are generated on the fly (everyone not yet played), so the
+    dense complement graph is never materialised.
+    """
+
+    def __init__(self, order, played, match):
+        self.order = order
+        self.played = played
+        self.match = match
+        self.n = len(order)
+
+    def neighbours(self, v):
+        order, played, pv = self.order, self.played, self.order[v]
+        return [u for u in range(self.n) if u != v and pair_key(pv, order[u]) not in played]
+
+    def _lca(self, a, b):
+        match, base, parent = self.match, self.base, self.parent
+        seen = [False] * self.n
+        while True:
+            a = base[a]
+            seen[a] = True
+            if match[a] == -1:
+                break
+            a = parent[match[a]]
+        while True:
+            b = base[b]
+            if seen[b]:
+                return b
+            b = parent[match[b]]
+
+    def _mark_path(self, v, b, child, blossom):
+        match, base, parent = self.match, self.base, self.parent
+        while base[v] != b:
+            blossom[base[v]] = blossom[base[match[v]]] = True
+            parent[v] = child
+            child = match[v]
+            v = parent[match[v]]
+
+    def _find_path(self, root):
+        n, match = self.n, self.match
+        self.base = base = list(range(n))
+        self.parent = parent = [-1] * n
+        used = [False] * n
+        used[root] = True
+        queue = [root]
+        head = 0
+        while head < len(queue):
+            v = queue[head]
+            head += 1
+            for to in self.neighbours(v):
+                if base[v] == base[to] or match[v] == to:
+                    continue
+                if to == root or (match[to] != -1 and parent[match[to]] != -1):
+                    cur = self._lca(v, to)
+                    blossom = [False] * n
+                    self._mark_path(v, cur, to, blossom)
+                    self._mark_path(to, cur, v, blossom)
+                    for i in range(n):
+                        if blossom[base[i]]:
+                            base[i] = cur
+                            if not used[i]:
+                                used[i] = True
+                                queue.append(i)
+                elif parent[to] == -1:
+                    parent[to] = v
+                    if match[to] == -1:
+                        return to
+                    used[match[to]] = True
+                    queue.append(match[to])
+        return -1
+
+    def maximise(self):
+        match = self.match
+        for root in range(self.n):
+            if match[root] != -1:
+                continue
+            v = self._find_path(root)
+            while v != -1:
+                pv = self.parent[v]
+                nv = match[pv]
+                match[v], match[pv] = pv, v
+                v = nv
+        return match
+
+
+def _match_pairs(order, played):
+    """Maximum rematch-free matching, with any leftovers paired as rematches."""
+    match = _Blossom(order, played, _greedy_match(order, played)).maximise()
+    pairs = [(a, c) for a, c in enumerate(match) if a < c]
+    leftovers = [a for a, c in enumerate(match) if c == -1]
+    pairs.extend(zip(leftovers[0::2], leftovers[1::2]))
+    pairs.sort()
+    return [(order[a], order[c]) for a, c in pairs]
+
+
+def pair_swiss(points, played_pairs, had_bye=(), rng=random, max_steps=MAX_SEARCH_STEPS):
+    """Pair the next Swiss round.
+
+    ``points`` maps player id -> points so far and ``played_pairs`` holds
+    ``pair_key`` tuples of players who already met. With an odd number of
+    players the lowest-ranked player without a previous bye (``had_bye``)
+    sits out.
+
+    Returns ``(pairs, bye)`` where ``pairs`` is a list of ``(p1, p2)`` in
+    table order and ``bye`` is a player id or None. Rematches only appear
+    when no rematch-free pairing exists for any of the bye candidates.
+    """
+    order = order_by_score(points, rng)
+
+    if len(order) % 2 == 0:
+        bye_candidates = [None]
+    else:
+        had_bye = set(had_bye)
+        bye_candidates = [pid for pid in reversed(order) if pid not in had_bye][:MAX_BYE_CANDIDATES]
+        if not bye_candidates:
+            bye_candidates = [order[-1]]
+
+    for bye in bye_candidates:
+        remaining = [pid for pid in order if pid != bye]
+        pairs = _search(remaining, played_pairs, max_steps)
+        if pairs is not None:
+            return pairs, bye
+
+    best = None
+    for bye in bye_candidates:
+        pairs = _match_pairs([pid for pid in order if pid != bye], played_pairs)
+        rematches = sum(pair_key(p1, p2) in played_pairs for p1, p2 in pairs)
+        if best is None or rematches < best[0]:
+            best = (rematches, pairs, bye)
+        if not rematches:
+            break
+    return best[1], best[2]
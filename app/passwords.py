@@ -0,0 +1,124 @@
+"""Password hashing off the request thread.
+
+bcrypt is deliberately slow (~250ms per hash at the default cost), so
+``PasswordHasher`` (instantiated in ``app.extensions``) runs it in a
+process pool of ``PASSWORD_HASH_WORKERS`` workers. The request thread
+only waits on the result, so other requests keep being served and a burst
+of logins can use every core instead of queueing behind the GIL.
+
+At most ``PASSWORD_HASH_MAX_PENDING`` hashes may be queued or running at
+once. A request that cannot get a slot within
+``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds raises ``HasherBusy``, which the
+app turns into a 503 so clients back off instead of piling up.
+
+Logins rehash the password when the stored hash was made with a different
+cost than ``BCRYPT_ROUNDS``, so raising the cost upgrades accounts as
+their owners sign in. ``PASSWORD_HASH_WORKERS=0`` hashes inline, which is
+what tests and one-off scripts want.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from threading import BoundedSemaphore, Lock
+from passlib.context import CryptContext
+
+DEFAULT_ROUNDS = 12
+
+# CryptContexts are cheap to build but not picklable, so each worker
+# process keeps its own per cost setting
+_contexts = {}
+
+
+def make_context(rounds=DEFAULT_ROUNDS):
+    context = _contexts.get(rounds)
+    if context is None:
+        context = _contexts[rounds] = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+    return context
+
+
+def _hash(password, rounds):
+    return make_context(rounds).hash(password)
+
+
+def _verify_and_update(password, pw_hash, rounds):
+    return make_context(rounds).verify_and_update(password, pw_hash)
+
+
+class HasherBusy(Exception):
+    """Too many password hashes are already queued."""
+
+
+class PasswordHasher:
+    def __init__(self):
+        self.rounds = DEFAULT_ROUNDS
+        self.workers = 0
+        self.max_pending = 0
+        self.queue_timeout = None
+        self.executor = None
+        self._slots = None
+        self._lock = Lock()
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def init_app(self, app):
+        self.rounds = app.config.get("BCRYPT_ROUNDS", DEFAULT_ROUNDS)
+        self.workers = app.config.get("PASSWORD_HASH_WORKERS", 0)
+        self.max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", 32)
+        self.queue_timeout = app.config.get("PASSWORD_HASH_QUEUE_TIMEOUT", 5)
+        self._slots = BoundedSemaphore(self.max_pending) if self.max_pending else None
+        self.shutdown()
+        if self.workers:
+            # worker processes are started on first use
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        app.extensions["password_hasher"] = self
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def _run(self, fn, *args):
+        if self._slots is not None and not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HasherBusy()
+
+        with self._lock:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            if self.executor is None:
+                return fn(*args)
+            return self.executor.submit(fn, *args).result()
+        finally:
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+            if self._slots is not None:
+                self._slots.release()
+
+    def hash(self, password):
+        return self._run(_hash, password, self.rounds)
+
+    def verify_and_update(self, password, pw_hash):
+        """Check ``password`` against ``pw_hash``.
+
+        Returns ``(ok, new_hash)``; ``new_hash`` is set when the password
+        matched but the stored hash should be replaced. Hashes that are not
+        bcrypt at all (e.g. the ``"!"`` placeholder of accounts that cannot
+        log in) never match and are not sent to a worker.
+        """
+        if not make_context(self.rounds).identify(pw_hash, required=False):
+            return False, None
+        return self._run(_verify_and_update, password, pw_hash, self.rounds)
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "queue_depth": self.pending,
+            "peak_queue_depth": self.peak_pending,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,151 @@
+"""Event role and site token checks shared by the blueprints.
+
+A user's roles in an event are read from the primary (never a replica,
+even in ``@read_only`` views) with one lookup on the (event_id, user_id,
+role) unique index, memoised for the rest of the request on ``flask.g``
+and kept in a short-lived in-process cache so repeated admin requests
+skip the query entirely. Anything that changes roles must call
+``invalidate_roles`` after committing; other worker processes see the
+change once their cached entry expires (``EVENT_ROLE_CACHE_TTL``
+seconds).
+
+Site-wide operations that no event role covers are gated on a bearer
+token from the config instead (``require_site_token``).
+"""
+import hmac
+import time
+from functools import wraps
+from threading import Lock
+from flask import current_app, g, jsonify, request
+from flask_jwt_extended import get_jwt_identity
+from app.extensions import db
+from app.models import EventRole
+from app.routing import on_primary
+
+
+class RoleCache:
+    """(user_id, event_id) -> frozenset of roles, expiring after a TTL.
+
+    Every invalidation bumps ``generation``. Readers take it before
+    querying and pass it to ``set``, which drops the entry if an
+    invalidation happened in between, so roles read just before a change
+    aren't cached for a whole TTL after it.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = Lock()
+        self.generation = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        roles, expires = entry
+        if expires < time.monotonic():
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return roles
+
+    def set(self, key, roles, ttl, generation):
+        with self._lock:
+            if generation == self.generation:
+                self._entries[key] = (roles, time.monotonic() + ttl)
+
+    def invalidate(self, event_id, user_id=None):
+        with self._lock:
+            self.generation += 1
+            if user_id is not None:
+                self._entries.pop((int(user_id), event_id), None)
+            else:
+                for key in [k for k in self._entries if k[1] == event_id]:
+                    del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+
+role_cache = RoleCache()
+
+
+def event_roles(user_id, event_id):
+    """The set of roles ``user_id`` holds in ``event_id`` (empty if none)."""
+    key = (int(user_id), event_id)
+
+    memo = g.setdefault("_event_roles", {})
+    if key in memo:
+        return memo[key]
+
+    ttl = current_app.config.get("EVENT_ROLE_CACHE_TTL", 0)
+    roles = role_cache.get(key) if ttl else None
+    if roles is None:
+        generation = role_cache.generation
+        with on_primary():
+            roles = frozenset(
+                role for (role,) in db.session.query(EventRole.role)
+                .filter(EventRole.event_id == event_id, EventRole.user_id == key[0])
+            )
+        if ttl:
+            role_cache.set(key, roles, ttl, generation)
+
+    memo[key] = roles
+    return roles
+
+
+def has_event_role(user_id, event_id, *roles):
+    return not event_roles(user_id, event_id).isdisjoint(roles)
+
+
+def invalidate_roles(event_id, user_id=None):
+    """Forget cached roles for one user, or everyone, in an event."""
+    role_cache.invalidate(event_id, user_id)
+    memo = g.get("_event_roles")
+    if memo:
+        for key in [k for k in memo if k[1] == event_id and (user_id is None or k[0] == int(user_id))]:
+            del memo[key]
+
+
+def require_event_role(*roles, msg="forbidden"):
+    """Reject the request with 403 unless the caller holds one of ``roles``.
+
+    The wrapped view must take an ``event_id`` URL argument and sit below
+    ``@jwt_required()``.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not has_event_role(get_jwt_identity(), kwargs["event_id"], *roles):
+                return jsonify({"msg": msg}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def site_token_valid(config_key):
+    """Whether the request carries ``Authorization: Bearer <token>`` for the
+    token configured under ``config_key``; never true while it is unset."""
+    token = current_app.config.get(config_key)
+    if not token:
+        return False
+    return hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+
+
+def require_site_token(config_key):
+    """Reject the request with 403 unless it carries the ``config_key`` token.
+
+    While the token is unset the view doesn't exist (404), so an endpoint
+    stays off until an operator configures it.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get(config_key):
+                return jsonify({"error": "not found"}), 404
+            if not site_token_valid(config_key):
+                return jsonify({"msg": "forbidden"}), 403
+            return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,85 @@
+"""Schedule generation on plain ids and dates.
+
+The generate endpoints read what they need from the database (players,
+points, past pairings, the last match date) and hand it to these
+functions, which return (or, for round robins, yield) the proposed
+matches as ``(round, date, p1, p2)`` tuples without touching the
+database or building ORM objects. The endpoints then either write them
+with ``bulk_create_matches`` or, with ``?preview=true``, return them as
+they are.
+"""
+import random
+from datetime import timedelta
+from app.pairing import pair_swiss
+
+# time between rounds of a generated schedule
+ROUND_INTERVAL = timedelta(weeks=1)
+# the first generated round is played this long after today
+FIRST_ROUND_DELAY = timedelta(days=7)
+
+
+def first_round_date(last_match_date, today):
+    """Date for the next generated round: a week after the event's last
+    match, or a week from today if it has none yet."""
+    if last_match_date is None:
+        return today + FIRST_ROUND_DELAY
+    return last_match_date + ROUND_INTERVAL
+
+
+def round_robin_rounds(num_players, legs=1):
+    """Rounds in a round robin of ``num_players`` (one sits out each round if odd)."""
+    return legs * (num_players - 1 + num_players % 2)
+
+
+def round_robin_matches(num_players, legs=1):
+    return legs * num_players * (num_players - 1) // 2
+
+
+def round_robin(players, start_date, legs=1):
+    """Yield every pairing of ``players``, ``legs`` times over, by the circle method.
+
+    The last player (or an empty seat, if the count is odd) stays fixed and
+    the others rotate, so round r (0-based within a leg) pairs seat r with
+    the fixed seat and seats (r + i) and (r - i) modulo n - 1 for every
+    other table i. Each pairing is computed directly, so only the player
+    list is held in memory however long the schedule is.
+
+    ``p1`` is the home player. Home and away alternate by table, which gives
+    every player the same number of home matches, give or take one. In a
+    second leg every pairing comes back with home and away swapped. With an
+    odd number of players one sits out each round (no match is generated
+    for them). Round r is dated ``start_date`` plus r - 1 weeks.
+    """
+    seats = list(players)
+    if len(seats) % 2 != 0:
+        seats.append(None)
+    fixed = seats[-1]
+    rotating = len(seats) - 1
+    half = len(seats) // 2
+
+    round_num = 0
+    for leg in range(legs):
+        for r in range(rotating):
+            round_num += 1
+            match_date = start_date + ROUND_INTERVAL * (round_num - 1)
+            pairs = [(seats[r], fixed) if r % 2 else (fixed, seats[r])]
+            for i in range(1, half):
+                first, second = seats[(r + i) % rotating], seats[(r - i) % rotating]
+                pairs.append((first, second) if i % 2 else (second, first))
+            for home, away in pairs:
+                if home is None or away is None:
+                    continue
+                yield (round_num, match_date, away, home) if leg % 2 else (round_num, match_date, home, away)
+
+
+def swiss_round(players, points, played_pairs, had_bye, round_num, match_date, seed=None):
+    """Pair the next Swiss round of ``players``.
+
+    ``points`` may leave out players without results; ``played_pairs`` and
+    ``had_bye`` are as for ``pair_swiss``. Players on equal points are
+    shuffled with ``random.Random(seed)``, so the same seed and history
+    give the same round. Returns ``(matches, bye)``.
+    """
+    points = {pid: points.get(pid, 0) for pid in players}
+    pairs, bye = pair_swiss(points, played_pairs, had_bye, rng=random.Random(seed))
+    return [(round_num, match_date, p1, p2) for p1, p2 in pairs], bye
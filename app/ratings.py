@@ -0,0 +1,360 @@
+"""Player ratings across events: Elo and Glicko-2.
+
+Every user with a rated match has one ``Rating`` row holding both an Elo
+rating and a Glicko-2 rating (rating, deviation, volatility). Only
+two-player matches with recorded results are rated.
+
+Ratings are updated incrementally by ``rate_matches`` when results
+complete a match. Each match is its own Glicko-2 rating period, so
+deviations don't grow with time away. Re-recorded results, deleted
+matches and imported events are not re-rated as they happen. ``recompute``
+(``flask ratings recompute``) replays the whole completed history in
+``(date, match_id)`` order and replaces every rating.
+
+``replay`` is the recompute core. Matches are split into levels: a
+match's level is one more than the highest level of either player's
+previous match. Matches in a level have no player in common and only
+depend on lower levels. With NumPy installed, each level is then rated
+as a whole with array operations, which gives the same result as
+rating the matches one by one. Without NumPy it falls back to a loop.
+
+``RATING_ELO_K`` and ``RATING_GLICKO_TAU`` set the Elo K-factor and the
+Glicko-2 system constant.
+"""
+import math
+import time
+from itertools import groupby
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+from app.models import Match, MatchPlayer, Rating
+
+try:
+    import numpy as np
+except ImportError:  # optional, only makes recompute faster
+    np = None
+
+ELO_START = 1500.0
+GLICKO_START = 1500.0
+GLICKO_RD_START = 350.0
+GLICKO_VOLATILITY_START = 0.06
+# converts between the Glicko and Glicko-2 scales
+GLICKO_SCALE = 173.7178
+# volatility iteration stops when the bracket is this narrow
+CONVERGENCE = 1e-6
+RESULT_SCORES = {"win": 1.0, "loss": 0.0, "tie": 0.5}
+# rating rows written per INSERT batch by recompute
+WRITE_BATCH_SIZE = 1000
+
+
+def elo_update(rating, opponent, score, k):
+    expected = 1 / (1 + 10 ** ((opponent - rating) / 400))
+    return rating + k * (score - expected)
+
+
+def _volatility(phi, sigma, v, delta, tau):
+    """New Glicko-2 volatility (step 5 of Glickman's paper, Illinois method)."""
+    a = math.log(sigma ** 2)
+
+    def f(x):
+        ex = math.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    A = a
+    if delta ** 2 > phi ** 2 + v:
+        B = math.log(delta ** 2 - phi ** 2 - v)
+    else:
+        B = a - tau
+        while f(B) < 0:
+            B -= tau
+
+    fA, fB = f(A), f(B)
+    while abs(B - A) > CONVERGENCE:
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        if fC * fB <= 0:
+            A, fA = B, fB
+        else:
+            fA /= 2
+        B, fB = C, fC
+    return math.exp(A / 2)
+
+
+def glicko2_update(rating, rd, volatility, opp_rating, opp_rd, score, tau):
+    """One game as one rating period; returns ``(rating, rd, volatility)``."""
+    mu = (rating - GLICKO_START) / GLICKO_SCALE
+    phi = rd / GLICKO_SCALE
+    opp_mu = (opp_rating - GLICKO_START) / GLICKO_SCALE
+    opp_phi = opp_rd / GLICKO_SCALE
+
+    g = 1 / math.sqrt(1 + 3 * opp_phi ** 2 / math.pi ** 2)
+    expected = 1 / (1 + math.exp(-g * (mu - opp_mu)))
+    v = 1 / (g ** 2 * expected * (1 - expected))
+    delta = v * g * (score - expected)
+
+    volatility = _volatility(phi, volatility, v, delta, tau)
+    phi_star = math.sqrt(phi ** 2 + volatility ** 2)
+    phi = 1 / math.sqrt(1 / phi_star ** 2 + 1 / v)
+    mu = mu + phi ** 2 * g * (score - expected)
+    return GLICKO_SCALE * mu + GLICKO_START, GLICKO_SCALE * phi, volatility
+
+
+def _volatility_arrays(phi, sigma, v, delta, tau):
+    a = np.log(sigma ** 2)
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    A = a
+    big = delta ** 2 > phi ** 2 + v
+    B = np.where(big, np.log(np.where(big, delta ** 2 - phi ** 2 - v, 1.0)), a - tau)
+    fB = f(B)
+    stepping = ~big & (fB < 0)
+    while stepping.any():
+        B = np.where(stepping, B - tau, B)
+        fB = f(B)
+        stepping &= fB < 0
+
+    fA = f(A)
+    active = np.abs(B - A) > CONVERGENCE
+    while active.any():
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        swap = fC * fB <= 0
+        A = np.where(active & swap, B, A)
+        fA = np.where(active, np.where(swap, fB, fA / 2), fA)
+        B = np.where(active, C, B)
+        fB = np.where(active, fC, fB)
+        active &= np.abs(B - A) > CONVERGENCE
+    return np.exp(A / 2)
+
+
+def _glicko2_arrays(mu, phi, sigma, opp_mu, opp_phi, score, tau):
+    """Vectorised ``glicko2_update`` on the Glicko-2 scale."""
+    g = 1 / np.sqrt(1 + 3 * opp_phi ** 2 / math.pi ** 2)
+    expected = 1 / (1 + np.exp(-g * (mu - opp_mu)))
+    v = 1 / (g ** 2 * expected * (1 - expected))
+    delta = v * g * (score - expected)
+
+    sigma = _volatility_arrays(phi, sigma, v, delta, tau)
+    phi_star = np.sqrt(phi ** 2 + sigma ** 2)
+    phi = 1 / np.sqrt(1 / phi_star ** 2 + 1 / v)
+    mu = mu + phi ** 2 * g * (score - expected)
+    return mu, phi, sigma
+
+
+def levels(first, second, num_players):
+    """Level of each game such that a level's games share no player."""
+    last = [0] * num_players
+    out = []
+    for i, j in zip(first, second):
+        level = max(last[i], last[j]) + 1
+        last[i] = last[j] = level
+        out.append(level)
+    return out
+
+
+def replay(first, second, scores, num_players, k=32, tau=0.5):
+    """Rate games in order from scratch.
+
+    Players are indexes ``0..num_players - 1``; game ``n`` is ``first[n]``
+    against ``second[n]`` with ``scores[n]`` (1, 0.5 or 0) for ``first``.
+    Returns lists ``elo, glicko, rd, volatility, played`` indexed by player.
+    """
+    if np is None:
+        return _replay_python(first, second, scores, num_players, k, tau)
+
+    first = np.asarray(first, dtype=np.int64)
+    second = np.asarray(second, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    elo = np.full(num_players, ELO_START)
+    mu = np.zeros(num_players)
+    phi = np.full(num_players, GLICKO_RD_START / GLICKO_SCALE)
+    sigma = np.full(num_players, GLICKO_VOLATILITY_START)
+    played = np.bincount(np.concatenate([first, second]), minlength=num_players)
+
+    game_levels = np.asarray(levels(first.tolist(), second.tolist(), num_players))
+    order = np.argsort(game_levels, kind="stable")
+    bounds = np.flatnonzero(np.diff(game_levels[order])) + 1
+    for idx in np.split(order, bounds) if len(order) else ():
+        i, j, s = first[idx], second[idx], scores[idx]
+        players = np.concatenate([i, j])
+        opponents = np.concatenate([j, i])
+        side_scores = np.concatenate([s, 1 - s])
+
+        expected = 1 / (1 + 10 ** ((elo[opponents] - elo[players]) / 400))
+        new_elo = elo[players] + k * (side_scores - expected)
+        new_mu, new_phi, new_sigma = _glicko2_arrays(
+            mu[players], phi[players], sigma[players], mu[opponents], phi[opponents], side_scores, tau,
+        )
+        elo[players] = new_elo
+        mu[players], phi[players], sigma[players] = new_mu, new_phi, new_sigma
+
+    return (
+        elo.tolist(),
+        (GLICKO_SCALE * mu + GLICKO_START).tolist(),
+        (GLICKO_SCALE * phi).tolist(),
+        sigma.tolist(),
+        played.tolist(),
+    )
+
+
+def _replay_python(first, second, scores, num_players, k, tau):
+    elo = [ELO_START] * num_players
+    glicko = [GLICKO_START] * num_players
+    rd = [GLICKO_RD_START] * num_players
+    volatility = [GLICKO_VOLATILITY_START] * num_players
+    played = [0] * num_players
+    for i, j, s in zip(first, second, scores):
+        elo[i], elo[j] = elo_update(elo[i], elo[j], s, k), elo_update(elo[j], elo[i], 1 - s, k)
+        new_i = glicko2_update(glicko[i], rd[i], volatility[i], glicko[j], rd[j], s, tau)
+        new_j = glicko2_update(glicko[j], rd[j], volatility[j], glicko[i], rd[i], 1 - s, tau)
+        glicko[i], rd[i], volatility[i] = new_i
+        glicko[j], rd[j], volatility[j] = new_j
+        played[i] += 1
+        played[j] += 1
+    return elo, glicko, rd, volatility, played
+
+
+def new_rating(user_id):
+    return Rating(
+        user_id=user_id,
+        elo=ELO_START,
+        glicko=GLICKO_START,
+        glicko_rd=GLICKO_RD_START,
+        glicko_volatility=GLICKO_VOLATILITY_START,
+        matches=0,
+    )
+
+
+def _create_missing(user_ids):
+    """Insert starting ratings for the ``user_ids`` that have none.
+
+    Two requests rating a new player's first matches at the same time
+    both try to insert their row. Each insert runs in a savepoint, so
+    losing that race only rolls back the duplicate row, not the results
+    already applied in the transaction; the winner's row is read back by
+    the caller.
+    """
+    existing = set(db.session.scalars(select(Rating.user_id).where(Rating.user_id.in_(user_ids))))
+    for uid in sorted(set(user_ids) - existing):
+        try:
+            with db.session.begin_nested():
+                db.session.add(new_rating(uid))
+        except IntegrityError:
+            pass
+
+
+def _game(match):
+    """``(user_a, user_b, score_a)`` for a rateable match, else None."""
+    if len(match.match_players) != 2:
+        return None
+    a, b = match.match_players
+    if a.result not in RESULT_SCORES or b.result not in RESULT_SCORES:
+        return None
+    return a.user_id, b.user_id, RESULT_SCORES[a.result]
+
+
+def rate_matches(matches):
+    """Apply newly completed matches, in order, to their players' ratings."""
+    games = [g for g in map(_game, matches) if g is not None]
+    if not games:
+        return []
+    k = current_app.config["RATING_ELO_K"]
+    tau = current_app.config["RATING_GLICKO_TAU"]
+
+    user_ids = {uid for a, b, _s in games for uid in (a, b)}
+    _create_missing(user_ids)
+    # locked so concurrent results for the same players apply one after the other
+    ratings = {
+        r.user_id: r
+        for r in Rating.query.filter(Rating.user_id.in_(user_ids)).order_by(Rating.user_id).with_for_update()
+    }
+
+    for a, b, s in games:
+        ra, rb = ratings[a], ratings[b]
+        ra.elo, rb.elo = elo_update(ra.elo, rb.elo, s, k), elo_update(rb.elo, ra.elo, 1 - s, k)
+        new_a = glicko2_update(ra.glicko, ra.glicko_rd, ra.glicko_volatility, rb.glicko, rb.glicko_rd, s, tau)
+        new_b = glicko2_update(rb.glicko, rb.glicko_rd, rb.glicko_volatility, ra.glicko, ra.glicko_rd, 1 - s, tau)
+        ra.glicko, ra.glicko_rd, ra.glicko_volatility = new_a
+        rb.glicko, rb.glicko_rd, rb.glicko_volatility = new_b
+        ra.matches += 1
+        rb.matches += 1
+    return list(ratings.values())
+
+
+def load_games():
+    """Rateable completed games as ``(user_ids, first, second, scores)``."""
+    rows = db.session.execute(
+        select(MatchPlayer.match_id, MatchPlayer.user_id, MatchPlayer.result)
+        .join(Match, Match.match_id == MatchPlayer.match_id)
+        .where(Match.status == "completed")
+        .order_by(Match.date, Match.match_id, MatchPlayer.mp_id)
+    )
+
+    index, user_ids = {}, []
+    first, second, scores = [], [], []
+    for _match_id, match_rows in groupby(rows, key=lambda r: r[0]):
+        match_rows = list(match_rows)
+        if len(match_rows) != 2 or any(r[2] not in RESULT_SCORES for r in match_rows):
+            continue
+        (_, a, result), (_, b, _) = match_rows
+        for uid in (a, b):
+            if uid not in index:
+                index[uid] = len(user_ids)
+                user_ids.append(uid)
+        first.append(index[a])
+        second.append(index[b])
+        scores.append(RESULT_SCORES[result])
+    return user_ids, first, second, scores
+
+
+def recompute():
+    """Replace every rating by replaying the full completed match history."""
+    start = time.perf_counter()
+    user_ids, first, second, scores = load_games()
+    loaded = time.perf_counter()
+    elo, glicko, rd, volatility, played = replay(
+        first, second, scores, len(user_ids),
+        k=current_app.config["RATING_ELO_K"], tau=current_app.config["RATING_GLICKO_TAU"],
+    )
+    replayed = time.perf_counter()
+
+    db.session.execute(delete(Rating))
+    rows = [
+        {
+            "user_id": uid,
+            "elo": elo[i],
+            "glicko": glicko[i],
+            "glicko_rd": rd[i],
+            "glicko_volatility": volatility[i],
+            "matches": played[i],
+        }
+        for i, uid in enumerate(user_ids)
+    ]
+    for offset in range(0, len(rows), WRITE_BATCH_SIZE):
+        db.session.execute(insert(Rating), rows[offset:offset + WRITE_BATCH_SIZE])
+
+    return {
+        "players": len(user_ids),
+        "matches": len(first),
+        "engine": "numpy" if np is not None else "python",
+        "load_seconds": round(loaded - start, 3),
+        "replay_seconds": round(replayed - loaded, 3),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def rating_summary(rating):
+    """A user's ratings for API payloads; users without rated matches get the defaults."""
+    if rating is None:
+        rating = new_rating(None)
+    return {
+        "elo": round(rating.elo, 1),
+        "glicko": round(rating.glicko, 1),
+        "glicko_rd": round(rating.glicko_rd, 1),
+        "glicko_volatility": round(rating.glicko_volatility, 6),
+        "matches": rating.matches,
+    }
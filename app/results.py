@@ -0,0 +1,56 @@
+"""Turning submitted scores into match results.
+
+Shared by the single-match endpoint and the batch endpoint so both
+validate scores the same way. Validation happens before anything is
+written, so a rejected submission leaves the match untouched.
+"""
+from sqlalchemy.orm.attributes import flag_modified
+
+
+class ResultError(ValueError):
+    """Submitted scores can't be recorded for a match."""
+
+
+def parse_scores(match, scores):
+    """Validate ``scores`` (user id string -> score) for ``match``.
+
+    Returns ``{user_id: int score}`` for every match player or raises
+    ResultError with a message suitable for the client.
+    """
+    if not scores or not isinstance(scores, dict) or len(scores) != len(match.match_players):
+        raise ResultError("Scores must be provided for all match players")
+
+    parsed = {}
+    for mp in match.match_players:
+        if str(mp.user_id) not in scores:
+            raise ResultError(f"Missing score for player {mp.user_id}")
+        try:
+            parsed[mp.user_id] = int(scores[str(mp.user_id)])
+        except (TypeError, ValueError):
+            raise ResultError(f"Invalid score for player {mp.user_id}")
+
+    if len(match.match_players) != 2:
+        raise ResultError("Currently only supports 2-player matches")
+    return parsed
+
+
+def assign_results(match, parsed):
+    """Store parsed scores on the match players and decide win/loss/tie."""
+    for mp in match.match_players:
+        mp.score = parsed[mp.user_id]
+
+    p1, p2 = match.match_players
+    if p1.score > p2.score:
+        p1.result = "win"
+        p2.result = "loss"
+    elif p2.score > p1.score:
+        p2.result = "win"
+        p1.result = "loss"
+    else:
+        p1.result = p2.result = "tie"
+
+    # always write both columns so a batch of results flushes as one
+    # executemany instead of one UPDATE per differently-shaped row
+    for mp in match.match_players:
+        flag_modified(mp, "score")
+        flag_modified(mp, "result")
@@ -0,0 +1,165 @@
+"""Bulk registration of players into an event.
+
+``import_players`` takes any iterable of emails (it is consumed once, so a
+streamed upload never has to be held in memory as text), resolves them to
+users with chunked ``IN`` queries, skips anyone already registered using
+the event's existing rows loaded up front, and writes the new
+EventPlayer, EventRole and Standing rows as batched executemany inserts.
+"""
+import csv
+import io
+import json
+import os
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import EventPlayer, EventRole, Standing, User
+from app.scheduling import batches
+from app import standings
+
+# emails resolved per SELECT ... WHERE email IN (...) and rows per INSERT batch
+IMPORT_CHUNK_SIZE = 500
+
+# unknown emails echoed back in the summary (the count is always exact)
+MAX_REPORTED_UNKNOWN = 100
+
+# browsers send generic mimetypes for these, so trust the file extension
+UPLOAD_TYPES = {
+    ".csv": "text/csv",
+    ".json": "application/json",
+    ".jsonl": "application/x-ndjson",
+    ".ndjson": "application/x-ndjson",
+}
+
+
+def upload_content_type(filename, mimetype):
+    ext = os.path.splitext(filename or "")[1].lower()
+    return UPLOAD_TYPES.get(ext, mimetype or "")
+
+
+def read_emails(stream, content_type):
+    """Yield emails from an uploaded CSV, NDJSON or JSON body.
+
+    CSV and NDJSON are read line by line. CSV uses an ``email`` column when
+    the header has one and the first column otherwise. JSON accepts a list
+    of emails or objects with an ``email`` key, or ``{"emails": [...]}``;
+    it has to be parsed as a whole.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        for line in text:
+            if line.strip():
+                yield _email_of(json.loads(line))
+    elif "json" in content_type:
+        data = json.load(text)
+        if isinstance(data, dict):
+            data = data.get("emails") or []
+        for item in data:
+            yield _email_of(item)
+    else:
+        rows = csv.reader(text)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [h.strip().lower() for h in header]
+        if "email" in names:
+            column = names.index("email")
+        else:
+            column = 0
+            yield header[0] if header else None
+        for row in rows:
+            yield row[column] if len(row) > column else None
+
+
+def _email_of(item):
+    return item.get("email") if isinstance(item, dict) else item
+
+
+def import_players(event_id, emails, chunk_size=IMPORT_CHUNK_SIZE, max_rows=None):
+    """Register every known user in ``emails`` as a player of the event.
+
+    Returns a summary dict with ``added``, ``skipped`` (already registered
+    or repeated in the upload), ``unknown`` (no such user) and the first
+    ``MAX_REPORTED_UNKNOWN`` unknown emails. The caller commits. Raises
+    ValueError if the upload has more than ``max_rows`` rows.
+    """
+    registered = {
+        uid for (uid,) in db.session.query(EventPlayer.user_id).filter_by(event_id=event_id)
+    }
+    has_role = {
+        uid for (uid,) in db.session.query(EventRole.user_id).filter_by(event_id=event_id, role="player")
+    }
+
+    seen_emails = set()
+    summary = {"rows": 0, "added": 0, "skipped": 0, "unknown": 0, "unknown_emails": []}
+    added_ids = []
+
+    for chunk in batches(emails, chunk_size):
+        summary["rows"] += len(chunk)
+        if max_rows is not None and summary["rows"] > max_rows:
+            raise ValueError(f"at most {max_rows} rows per import")
+
+        wanted = []
+        for email in chunk:
+            email = email.strip() if isinstance(email, str) else ""
+            if not email:
+                continue
+            if email in seen_emails:
+                summary["skipped"] += 1
+                continue
+            seen_emails.add(email)
+            wanted.append(email)
+
+        found = dict(
+            db.session.query(User.email, User.user_id).filter(User.email.in_(wanted))
+        ) if wanted else {}
+
+        new_ids = []
+        for email in wanted:
+            user_id = found.get(email)
+            if user_id is None:
+                summary["unknown"] += 1
+                if len(summary["unknown_emails"]) < MAX_REPORTED_UNKNOWN:
+                    summary["unknown_emails"].append(email)
+            elif user_id in registered:
+                summary["skipped"] += 1
+            else:
+                registered.add(user_id)
+                new_ids.append(user_id)
+
+        if new_ids:
+            _insert_players(event_id, new_ids, has_role)
+            added_ids.extend(new_ids)
+            summary["added"] += len(new_ids)
+
+    if added_ids:
+        _insert_standings(event_id, added_ids, chunk_size)
+        standings.rerank(event_id)
+    return summary
+
+
+def _insert_players(event_id, user_ids, has_role):
+    db.session.execute(insert(EventPlayer), [
+        {"event_id": event_id, "user_id": uid} for uid in user_ids
+    ])
+    roles = [{"event_id": event_id, "user_id": uid, "role": "player"} for uid in user_ids if uid not in has_role]
+    if roles:
+        db.session.execute(insert(EventRole), roles)
+        has_role.update(r["user_id"] for r in roles)
+
+
+def _insert_standings(event_id, user_ids, chunk_size):
+    # players re-added to an event keep the results they already have
+    totals = {row[0]: row[1:] for row in standings.totals_query(event_id)}
+    for chunk in batches(user_ids, chunk_size):
+        ep_ids = (
+            db.session.query(EventPlayer.user_id, EventPlayer.ep_id)
+            .filter(EventPlayer.event_id == event_id, EventPlayer.user_id.in_(chunk))
+        )
+        rows = []
+        for user_id, ep_id in ep_ids:
+            wins, losses, ties, score = totals.get(user_id, (0, 0, 0, 0))
+            rows.append({
+                "ep_id": ep_id, "event_id": event_id, "user_id": user_id,
+                "wins": wins, "losses": losses, "ties": ties, "score": score,
+            })
+        db.session.execute(insert(Standing), rows)
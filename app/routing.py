@@ -0,0 +1,112 @@
+"""Read replica routing.
+
+Replicas are listed in ``DATABASE_REPLICA_URLS``; each gets an engine
+with the same pool settings as the primary, named ``replica_0``,
+``replica_1``, ... in pool metrics. Views marked ``@read_only`` send
+their queries to one replica per request, picked round-robin.
+Everything else uses the primary, and so do flushes and INSERT/UPDATE/
+DELETE statements even inside a read-only view.
+
+Replicas lag behind the primary, so a client that has just written is
+pinned to the primary for ``READ_YOUR_WRITES_SECONDS`` with a cookie:
+an organizer who records a result and reloads the event sees it, even
+though spectators may get it a moment later.
+"""
+import time
+from contextlib import contextmanager
+from functools import wraps
+from itertools import cycle
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event
+
+REPLICA_BIND_PREFIX = "replica_"
+STICKY_COOKIE = "ttt_primary_until"
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, "is_dml", False):
+            replica = g.get("_replica_engine") if has_request_context() else None
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _flushed(session, _flush_context):
+    if has_request_context():
+        g._wrote_primary = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _executed(orm_execute_state):
+    if has_request_context() and (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        g._wrote_primary = True
+
+
+def init_replicas(app, engine_options):
+    """Create an engine per DATABASE_REPLICA_URLS entry.
+
+    ``engine_options(url)`` returns the create_engine arguments for a URL.
+    """
+    engines = {
+        f"{REPLICA_BIND_PREFIX}{i}": create_engine(url, **engine_options(url))
+        for i, url in enumerate(app.config.get("DATABASE_REPLICA_URLS") or [])
+    }
+    app.extensions["db_replica_engines"] = engines
+    app.extensions["db_replicas"] = cycle(list(engines.values())) if engines else None
+
+    if engines:
+        app.after_request(_stick_to_primary)
+
+
+def _stick_to_primary(response):
+    if g.get("_wrote_primary"):
+        window = current_app.config["READ_YOUR_WRITES_SECONDS"]
+        response.set_cookie(
+            STICKY_COOKIE,
+            str(int(time.time() + window)),
+            max_age=window,
+            httponly=True,
+            secure=current_app.config.get("JWT_COOKIE_SECURE", False),
+            samesite=current_app.config.get("JWT_COOKIE_SAMESITE", "Lax"),
+        )
+    return response
+
+
+def _pinned_to_primary():
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_only(fn):
+    """Serve this view from a replica unless the caller wrote recently.
+
+    Place it directly below the route decorator so checks done by the
+    other decorators (roles, ETags) read from the replica too.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        replicas = current_app.extensions.get("db_replicas")
+        if replicas is not None and not _pinned_to_primary():
+            g._replica_engine = next(replicas)
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+@contextmanager
+def on_primary():
+    """Send the queries in this block to the primary, even in a read-only view.
+
+    For reads whose result outlives the request, such as cached
+    permissions, which must not be filled from a lagging replica.
+    """
+    replica = g.pop("_replica_engine", None) if has_request_context() else None
+    try:
+        yield
+    finally:
+        if replica is not None:
+            g._replica_engine = replica
@@ -0,0 +1,95 @@
+from itertools import islice
+from sqlalchemy import insert, select, text
+from app.extensions import db
+from app.models import Match, MatchPlayer
+
+# matches written per INSERT batch when bulk scheduling
+MATCH_BATCH_SIZE = 1000
+
+
+def batches(iterable, size):
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_matches(rows):
+    """Insert Match rows and return their new match_ids in the same order.
+
+    Every dialect sends a batch as a handful of statements rather than one
+    INSERT per row. All rows must belong to the same event.
+    """
+    dialect = db.session.get_bind(mapper=Match.__mapper__).dialect
+    if dialect.name == "sqlite":
+        # SQLAlchemy can't prove RETURNING order on SQLite and would fall back
+        # to one INSERT per row, but SQLite holds the write lock and hands out
+        # rowids in VALUES order, so the sorted ids line up with the rows
+        return sorted(db.session.scalars(insert(Match).returning(Match.match_id), rows).all())
+
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        # PostgreSQL and MariaDB batch the whole list into a few
+        # multi-row INSERT ... RETURNING statements
+        return db.session.scalars(
+            insert(Match).returning(Match.match_id, sort_by_parameter_order=True),
+            rows,
+        ).all()
+
+    if dialect.name == "mysql":
+        return _insert_matches_mysql(rows)
+
+    # anything else without RETURNING: let the unit of work collect the ids
+    matches = [Match(**row) for row in rows]
+    db.session.add_all(matches)
+    db.session.flush()
+    return [m.match_id for m in matches]
+
+
+def _insert_matches_mysql(rows):
+    """One multi-row INSERT, with the ids worked out from LAST_INSERT_ID().
+
+    MySQL has no RETURNING. LAST_INSERT_ID() is the id of the statement's
+    first row, and InnoDB numbers the rows of one INSERT in VALUES order.
+    With innodb_autoinc_lock_mode 0 or 1 a multi-row INSERT also gets one
+    consecutive block (spaced by auto_increment_increment), so the ids
+    follow arithmetically. Interleaved mode (2, MySQL 8's default) only
+    promises increasing ids, so there they are read back: the event's
+    first len(rows) matches from that id on.
+    """
+    first = db.session.execute(insert(Match.__table__).values(rows)).lastrowid
+    step, lock_mode = db.session.execute(
+        text("SELECT @@auto_increment_increment, @@innodb_autoinc_lock_mode")
+    ).one()
+    if int(lock_mode) < 2:
+        return list(range(first, first + step * len(rows), step))
+    return db.session.scalars(
+        select(Match.match_id)
+        .where(Match.event_id == rows[0]["event_id"], Match.match_id >= first)
+        .order_by(Match.match_id)
+        .limit(len(rows))
+    ).all()
+
+
+def bulk_create_matches(event_id, scheduled, status="scheduled", batch_size=MATCH_BATCH_SIZE):
+    """Write scheduled two-player matches in batches instead of one flush per match.
+
+    ``scheduled`` is an iterable of ``(round, date, p1, p2)`` tuples; it is
+    consumed lazily, ``batch_size`` matches at a time. The MatchPlayer rows
+    for each batch go out as a single executemany. Returns the number of
+    matches created.
+    """
+    created = 0
+    for batch in batches(scheduled, batch_size):
+        match_ids = insert_matches([
+            {"event_id": event_id, "round": round_num, "date": match_date, "status": status}
+            for round_num, match_date, _p1, _p2 in batch
+        ])
+        db.session.execute(insert(MatchPlayer), [
+            {"match_id": match_id, "user_id": user_id}
+            for match_id, (_round, _date, p1, p2) in zip(match_ids, batch)
+            for user_id in (p1, p2)
+        ])
+        created += len(batch)
+    return created
@@ -0,0 +1,300 @@
+from collections import Counter
+from itertools import groupby
+from flask import current_app
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import flag_modified
+from app.extensions import db
+from app.models import EventPlayer, Match, MatchPlayer, Standing, User
+from app import tiebreaks
+
+# maps a MatchPlayer.result onto the Standing counter it increments
+RESULT_FIELDS = {"win": "wins", "loss": "losses", "tie": "ties"}
+
+# position of each result's counter in an EventHistory record
+RECORD_INDEX = {"win": 0, "loss": 1, "tie": 2}
+
+# Swiss match points per result ("draw" is accepted as an alias of "tie")
+RESULT_POINTS = {"win": 3, "tie": 1, "draw": 1}
+
+
+class EventHistory:
+    """Completed results of an event, indexed for standings and pairing.
+
+    ``records`` maps user_id -> [wins, losses, ties, score], ``points`` maps
+    user_id -> Swiss match points, ``played_pairs`` holds sorted
+    ``(p1, p2)`` tuples of players who have met and ``matches`` is the list
+    of ``[(user_id, score, result), ...]`` per completed match.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.points = {}
+        self.played_pairs = set()
+        self.matches = []
+
+    def add_match(self, players):
+        self.matches.append(players)
+        for user_id, score, result in players:
+            record = self.records.setdefault(user_id, [0, 0, 0, 0])
+            if result in RECORD_INDEX:
+                record[RECORD_INDEX[result]] += 1
+            record[3] += score or 0
+            self.points[user_id] = self.points.get(user_id, 0) + RESULT_POINTS.get(result, 0)
+        if len(players) == 2:
+            p1, p2 = players[0][0], players[1][0]
+            self.played_pairs.add((p1, p2) if p1 <= p2 else (p2, p1))
+
+
+def sort_key(row, name, tiebreak=()):
+    """Leaderboard ordering: most wins, fewest losses, most ties, highest
+    score, highest tiebreakers in chain order, then name."""
+    return (-row.wins, row.losses, -row.ties, -row.score, *(-v for v in tiebreak), name.lower())
+
+
+def tiebreak_chain():
+    """The configured LEADERBOARD_TIEBREAKS (parsed by create_app)."""
+    return current_app.config.get("LEADERBOARD_TIEBREAKS", ())
+
+
+def match_points(standing):
+    """Swiss match points of a standing, as ``EventHistory.points`` counts them."""
+    return standing.wins * RESULT_POINTS["win"] + standing.ties * RESULT_POINTS["tie"]
+
+
+def tiebreak_values(event_id, chain, user_ids, rows, history=None):
+    """``{user_id: (value, ...)}`` of a tiebreak chain for ``user_ids``.
+
+    Only those players' matches are loaded (unless ``history`` is given, or
+    they are most of the field). Their opponents' match points and match
+    counts are read from ``rows``, every Standing of the event, instead.
+    """
+    if history is None:
+        # filtering on most of the field costs more than it saves
+        history = load_history(event_id, user_ids if len(user_ids) * 2 < len(rows) else None)
+    index = tiebreaks.OpponentIndex(
+        history,
+        RESULT_POINTS["win"],
+        points={s.user_id: match_points(s) for s in rows},
+        played={s.user_id: s.wins + s.losses + s.ties for s in rows},
+    )
+    values = tiebreaks.compute(index, chain)
+    no_matches = (0,) * len(chain)
+    return {user_id: values.get(user_id, no_matches) for user_id in user_ids}
+
+
+def event_standings(event_id):
+    """Every standing of an event keyed by user_id, for applying many matches at once."""
+    return {s.user_id: s for s in Standing.query.filter_by(event_id=event_id)}
+
+
+def apply_match(match, sign=1, rows=None):
+    """Add a match's recorded scores and results to its players' standings.
+
+    Pass sign=-1 to take a previously applied match back out again, e.g.
+    before results are re-recorded or when the match is deleted. ``rows``
+    may be a preloaded ``event_standings`` dict so a batch of matches
+    doesn't query the standings once per match. Returns the standings
+    that were changed.
+    """
+    user_ids = [mp.user_id for mp in match.match_players]
+    if not user_ids:
+        return []
+
+    if rows is None:
+        rows = {
+            s.user_id: s
+            for s in Standing.query.filter(
+                Standing.event_id == match.event_id,
+                Standing.user_id.in_(user_ids),
+            )
+        }
+
+    changed = []
+    for mp in match.match_players:
+        standing = rows.get(mp.user_id)
+        if standing is None:
+            continue
+        changed.append(standing)
+        standing.score += sign * (mp.score or 0)
+        field = RESULT_FIELDS.get(mp.result)
+        if field:
+            setattr(standing, field, getattr(standing, field) + sign)
+        # same UPDATE shape for every row so batches flush as one executemany
+        for counter in ("wins", "losses", "ties", "score"):
+            flag_modified(standing, counter)
+    return changed
+
+
+def rerank(event_id, history=None):
+    """Recompute the rank column for every standing in an event.
+
+    Players share a rank when their records and tiebreakers are equal.
+    Tiebreakers are only computed for players whose record is shared, and
+    stored in their ``tiebreaks`` column; everyone else's is cleared.
+    ``history`` may be an already loaded ``load_history`` to compute them
+    from. Only rows whose rank or tiebreakers actually changed are written
+    back; they are returned.
+    """
+    rows = (
+        db.session.query(Standing, User.name)
+        .join(User, Standing.user_id == User.user_id)
+        .filter(Standing.event_id == event_id)
+        .all()
+    )
+    chain = tiebreak_chain()
+    values = {}
+    if chain:
+        records = Counter(sort_key(s, name)[:-1] for s, name in rows)
+        shared = [s.user_id for s, name in rows if records[sort_key(s, name)[:-1]] > 1]
+        if shared:
+            values = tiebreak_values(event_id, chain, shared, [s for s, _name in rows], history)
+    no_matches = (0,) * len(chain)
+    keyed = [(sort_key(s, name, values.get(s.user_id, no_matches)), s) for s, name in rows]
+    keyed.sort(key=lambda r: r[0])
+
+    rank = 1
+    changed = []
+    for i, (key, standing) in enumerate(keyed):
+        # everything but the name decides whether players share a rank
+        if i > 0 and key[:-1] != keyed[i - 1][0][:-1]:
+            rank = i + 1
+        stored = dict(zip(chain, values[standing.user_id])) if standing.user_id in values else None
+        if standing.rank != rank or standing.tiebreaks != stored:
+            standing.rank = rank
+            standing.tiebreaks = stored
+            changed.append(standing)
+    return changed
+
+
+def totals_query(event_id):
+    """Per-player win/loss/tie/score totals for an event as one grouped query.
+
+    Only completed matches count, as in ``load_history``, so standings
+    created from these totals agree with ``rebuild``.
+    """
+    return (
+        db.session.query(
+            MatchPlayer.user_id,
+            db.func.sum(db.case((MatchPlayer.result == "win", 1), else_=0)),
+            db.func.sum(db.case((MatchPlayer.result == "loss", 1), else_=0)),
+            db.func.sum(db.case((MatchPlayer.result == "tie", 1), else_=0)),
+            db.func.coalesce(db.func.sum(MatchPlayer.score), 0),
+        )
+        .join(Match, Match.match_id == MatchPlayer.match_id)
+        .filter(Match.event_id == event_id, Match.status == "completed")
+        .group_by(MatchPlayer.user_id)
+    )
+
+
+def load_history(event_id, user_ids=None):
+    """Load every completed MatchPlayer row of an event in one query.
+
+    With ``user_ids`` only the matches those players played in are loaded
+    (with all of their players). Rows come back ordered by match, so they
+    are grouped per match and folded into an EventHistory in a single pass.
+    """
+    rows = (
+        db.session.query(MatchPlayer.match_id, MatchPlayer.user_id, MatchPlayer.score, MatchPlayer.result)
+        .join(Match, Match.match_id == MatchPlayer.match_id)
+        .filter(Match.event_id == event_id, Match.status == "completed")
+        .order_by(MatchPlayer.match_id, MatchPlayer.mp_id)
+    )
+    if user_ids is not None:
+        played_in = db.aliased(MatchPlayer)
+        rows = rows.filter(MatchPlayer.match_id.in_(
+            db.select(played_in.match_id).where(played_in.user_id.in_(user_ids))
+        ))
+
+    history = EventHistory()
+    for _match_id, match_rows in groupby(rows, key=lambda r: r[0]):
+        history.add_match([(user_id, score, result) for _mid, user_id, score, result in match_rows])
+    return history
+
+
+def had_bye(event_id, player_ids):
+    """Players who sat out at least one round, i.e. have fewer rounds than the event."""
+    rounds_played = dict(
+        db.session.query(MatchPlayer.user_id, db.func.count(db.distinct(Match.round)))
+        .join(Match, Match.match_id == MatchPlayer.match_id)
+        .filter(Match.event_id == event_id)
+        .group_by(MatchPlayer.user_id)
+    )
+    total_rounds = (
+        db.session.query(db.func.count(db.distinct(Match.round)))
+        .filter(Match.event_id == event_id)
+        .scalar()
+    )
+    return {pid for pid in player_ids if rounds_played.get(pid, 0) < total_rounds}
+
+
+def create_standing(ep):
+    """Create the standing row for a newly added EventPlayer.
+
+    A player who is re-added to an event keeps the results of matches they
+    already played, so their totals are read back from match history.
+    """
+    totals = totals_query(ep.event_id).filter(MatchPlayer.user_id == ep.user_id).first()
+    wins, losses, ties, score = totals[1:] if totals else (0, 0, 0, 0)
+    ep.standing = Standing(
+        event_id=ep.event_id,
+        user_id=ep.user_id,
+        wins=wins,
+        losses=losses,
+        ties=ties,
+        score=score,
+    )
+    return ep.standing
+
+
+def rebuild(event_id):
+    """Recompute every standing of an event from its match history."""
+    history = load_history(event_id)
+    totals = history.records
+
+    event_players = (
+        EventPlayer.query
+        .options(joinedload(EventPlayer.standing))
+        .filter_by(event_id=event_id)
+        .all()
+    )
+    for ep in event_players:
+        standing = ep.standing or Standing(event_id=event_id, user_id=ep.user_id)
+        standing.wins, standing.losses, standing.ties, standing.score = totals.get(ep.user_id, (0, 0, 0, 0))
+        ep.standing = standing
+
+    db.session.flush()
+    rerank(event_id, history)
+    return len(event_players)
+
+
+def leaderboard(event_id):
+    """Read an event's ranked standings with a single indexed query.
+
+    With tiebreakers configured each row also gets the values stored by
+    the last ``rerank`` under ``tiebreaks``: null for players whose record
+    isn't shared, since tiebreakers don't decide their rank.
+    """
+    rows = (
+        db.session.query(Standing, User.name)
+        .join(User, Standing.user_id == User.user_id)
+        .filter(Standing.event_id == event_id)
+        .order_by(Standing.rank, db.func.lower(User.name))
+        .all()
+    )
+    board = [
+        {
+            "user_id": s.user_id,
+            "name": name,
+            "wins": s.wins,
+            "losses": s.losses,
+            "ties": s.ties,
+            "score": s.score,
+            "rank": s.rank,
+        }
+        for s, name in rows
+    ]
+
+    if tiebreak_chain():
+        for row, (s, _name) in zip(board, rows):
+            row["tiebreaks"] = s.tiebreaks
+    return board
@@ -0,0 +1,113 @@
+"""Opponent-based tiebreakers for event leaderboards.
+
+Players with the same record are ordered by the chain of tiebreakers in
+``LEADERBOARD_TIEBREAKS`` (comma separated, applied in order, empty to
+share the rank as before):
+
+* ``buchholz``: sum of the opponents' match points.
+* ``sonneborn_berger``: opponents' match points, in full for opponents
+  beaten and half for ties.
+* ``owp``: average opponent match-win percentage, each opponent's
+  counted as at least 1/3 (the usual floor, so one weak opponent doesn't
+  sink a player).
+
+All of them are computed from an ``OpponentIndex``, built once from the
+``EventHistory`` that ``standings.load_history`` loads in one query.
+Each tiebreaker is then a single pass over the opponent lists, so a
+whole chain costs O(players + matches) instead of rescanning the
+matches for every player. ``standings.rerank`` only needs them for
+players who share a record, so it loads just those players' matches and
+takes everyone's match points from the standings.
+"""
+# weight of an opponent's points in Sonneborn-Berger, by result
+SB_WEIGHTS = {"win": 1.0, "tie": 0.5, "draw": 0.5}
+OWP_FLOOR = 1 / 3
+# tiebreak values are rounded so players with the same opponents tie
+# even if their sums were added up in a different order
+PRECISION = 6
+
+
+class OpponentIndex:
+    """Who each player met and how it went, from an EventHistory.
+
+    ``opponents`` maps user_id -> [(opponent_id, result), ...] for every
+    completed two-player match; ``points`` and ``played`` hold each
+    player's match points and number of matches, and ``win_points`` is
+    what a win is worth. ``points`` and ``played`` are counted from the
+    history unless they are passed in, which they must be when the
+    history only holds some players' matches.
+    """
+
+    def __init__(self, history, win_points, points=None, played=None):
+        self.points = history.points if points is None else points
+        self.win_points = win_points
+        self.opponents = {}
+        count_played = played is None
+        self.played = {} if count_played else played
+        for players in history.matches:
+            if count_played:
+                for user_id, _score, _result in players:
+                    self.played[user_id] = self.played.get(user_id, 0) + 1
+            if len(players) != 2:
+                continue
+            (a, _sa, ra), (b, _sb, rb) = players
+            self.opponents.setdefault(a, []).append((b, ra))
+            self.opponents.setdefault(b, []).append((a, rb))
+
+
+def buchholz(index):
+    points = index.points
+    return {
+        user_id: sum(points.get(opp, 0) for opp, _result in opps)
+        for user_id, opps in index.opponents.items()
+    }
+
+
+def sonneborn_berger(index):
+    points = index.points
+    return {
+        user_id: sum(points.get(opp, 0) * SB_WEIGHTS.get(result, 0) for opp, result in opps)
+        for user_id, opps in index.opponents.items()
+    }
+
+
+def owp(index):
+    win_pct = {
+        user_id: max(index.points.get(user_id, 0) / (index.win_points * played), OWP_FLOOR)
+        for user_id, played in index.played.items() if played
+    }
+    return {
+        user_id: sum(win_pct.get(opp, OWP_FLOOR) for opp, _result in opps) / len(opps)
+        for user_id, opps in index.opponents.items()
+    }
+
+
+TIEBREAKS = {
+    "buchholz": buchholz,
+    "sonneborn_berger": sonneborn_berger,
+    "owp": owp,
+}
+
+
+def parse_chain(value):
+    """``LEADERBOARD_TIEBREAKS`` as a tuple of names; raises ValueError for unknown ones."""
+    names = value.split(",") if isinstance(value, str) else list(value or ())
+    chain = tuple(name.strip() for name in names if name.strip())
+    unknown = [name for name in chain if name not in TIEBREAKS]
+    if unknown:
+        raise ValueError(f"unknown tiebreakers {unknown}; choose from {sorted(TIEBREAKS)}")
+    return chain
+
+
+def compute(index, chain):
+    """``{user_id: (value, ...)}`` for every tiebreaker in ``chain``, in order.
+
+    Players without completed matches are missing; they score 0 on
+    every tiebreaker.
+    """
+    columns = [TIEBREAKS[name](index) for name in chain]
+    users = set().union(*columns) if columns else set()
+    return {
+        user_id: tuple(round(column.get(user_id, 0), PRECISION) for column in columns)
+        for user_id in users
+    }
@@ -0,0 +1,86 @@
+"""Elimination bracket creation, advancement and rendering time.
+
+    python -m benchmarks.bench_brackets
+    python -m benchmarks.bench_brackets --sizes 64 1024 --format single
+    python -m benchmarks.bench_brackets --database-url mysql+pymysql://user:pw@localhost/ttt_bench
+
+For each size, seeds a bracket of that many players and times:
+
+* ``brackets.create_bracket`` (layout, byes and the first round's matches);
+* recording every result through ``brackets.advance`` until a champion
+  is decided, reported per result, with the number of SQL statements
+  each one costs on average;
+* ``brackets.render`` of the finished bracket.
+"""
+import argparse
+import random
+from datetime import date
+
+from sqlalchemy import event
+
+from app import brackets
+from app.extensions import db
+from app.models import Match
+from app.results import assign_results
+from benchmarks.common import make_app, reset_schema, seed_event, timed
+
+
+def play_out(event_id, rng):
+    """Decide every scheduled bracket match at random until none are left."""
+    played = 0
+    while True:
+        pending = Match.query.filter_by(event_id=event_id, status="scheduled").all()
+        if not pending:
+            return played
+        for match in pending:
+            a, b = (mp.user_id for mp in match.match_players)
+            assign_results(match, dict(zip((a, b), rng.sample(range(4), 2))))
+            match.status = "completed"
+            brackets.advance(match)
+            played += 1
+        db.session.flush()
+
+
+def run(sizes, fmt, database_url=None):
+    app = make_app(database_url)
+    rng = random.Random(0)
+    with app.app_context():
+        reset_schema()
+        engine = db.engine
+        for size in sizes:
+            results = {"players": size, "format": fmt}
+            event_id, _admin, players = seed_event(size)
+
+            with timed(results, "create_s"):
+                bracket, created = brackets.create_bracket(event_id, fmt, players, date.today())
+            db.session.commit()
+            results["first_matches"] = len(created)
+
+            statements = []
+            counter = lambda *args: statements.append(1)
+            event.listen(engine, "before_cursor_execute", counter)
+            with timed(results, "play_s"):
+                results["matches"] = play_out(event_id, rng)
+            event.remove(engine, "before_cursor_execute", counter)
+            db.session.commit()
+            results["per_result_ms"] = results["play_s"] * 1000 / results["matches"]
+            results["queries_per_result"] = len(statements) / results["matches"]
+
+            db.session.expire_all()
+            with timed(results, "render_s"):
+                rendered = brackets.render(db.session.get(type(bracket), bracket.bracket_id))
+            assert rendered["champion"] in players
+            print(", ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in results.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 128, 1024])
+    parser.add_argument("--format", choices=brackets.FORMATS, default="double")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    run(args.sizes, args.format, args.database_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Latency, query count and memory of the hot endpoints at tournament sizes.
+
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --sizes 16 128 --iterations 50 --output report.json
+    python -m benchmarks.bench_endpoints --baseline last-release.json
+    python -m benchmarks.bench_endpoints --http --concurrency 8
+
+For every size an event is seeded with ceil(log2(players)) + 1 completed,
+randomly paired rounds and one scheduled round. The endpoints are then
+called through the Flask test client:
+
+* ``get_event`` with the response cache emptied before each call, and
+  ``get_event_cached`` with it warm;
+* ``get_user_matches`` for a different player each call;
+* ``record_results`` on the scheduled round's matches;
+* ``generate_swiss_round``, each call pairing another round;
+* ``generate_round_robin`` on an event with no matches. A full schedule
+  has n(n-1)/2 matches, so it runs fewer times at large sizes (see
+  ``ROUND_ROBIN_MATCH_BUDGET``). At 1,024 players it takes most of the
+  run; ``--skip generate_round_robin`` leaves it out.
+
+The first call of each endpoint is a warm-up run under ``tracemalloc`` and
+gives ``peak_kib``; latency percentiles come from the remaining calls.
+Query counts and SQL / serialization time are read from the
+``Server-Timing`` header. ``--http`` also starts the app on a local
+threaded server and loads the read endpoints from ``--concurrency``
+clients.
+
+The JSON report (``--output``, stdout by default) has sorted keys so two
+runs diff cleanly. ``--baseline`` prints the p50 and query count change
+against an earlier report.
+"""
+import argparse
+import json
+import logging
+import math
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import count
+
+import sqlalchemy
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import make_server
+
+from app import standings
+from app.extensions import cache, db
+from app.models import MatchPlayer
+from benchmarks.common import make_app, reset_schema, seed_event, seed_history
+
+ENDPOINTS = (
+    "get_event", "get_event_cached", "get_user_matches",
+    "record_results", "generate_swiss_round", "generate_round_robin",
+)
+# matches generate_round_robin may create per size, summed over its calls
+ROUND_ROBIN_MATCH_BUDGET = 200_000
+TIMING = re.compile(r'(\w+);dur=([\d.]+)(?:;desc="(\d+) queries")?')
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def server_timing(response):
+    """``(queries, sql_ms, serialize_ms)`` from a response's Server-Timing header."""
+    timings, queries = {}, 0
+    for name, dur, desc in TIMING.findall(response.headers.get("Server-Timing", "")):
+        timings[name] = float(dur)
+        if desc:
+            queries = int(desc)
+    return queries, timings.get("db", 0.0), timings.get("serialize", 0.0)
+
+
+def summarize(latencies, queries, sql, serialize, size_bytes, peak):
+    ms = [s * 1000 for s in latencies]
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+        "max_ms": round(max(ms), 3),
+        "queries_p50": statistics.median_low(queries),
+        "queries_max": max(queries),
+        "sql_ms_p50": round(statistics.median(sql), 3),
+        "serialize_ms_p50": round(statistics.median(serialize), 3),
+        "response_kib": round(statistics.median(size_bytes) / 1024, 1),
+        "peak_kib": round(peak / 1024, 1),
+    }
+
+
+def measure(call, iterations, expect):
+    """Run ``call`` once traced, then ``iterations`` times timed."""
+    latencies, queries, sql, serialize, size_bytes = [], [], [], [], []
+    peak = 0
+    for i in range(iterations + 1):
+        if i == 0:
+            tracemalloc.start()
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        if i == 0:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        if response.status_code != expect:
+            raise RuntimeError(f"{response.request.path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        if i == 0:
+            continue
+        q, sql_ms, ser_ms = server_timing(response)
+        latencies.append(elapsed)
+        queries.append(q)
+        sql.append(sql_ms)
+        serialize.append(ser_ms)
+        size_bytes.append(len(response.get_data()))
+    return summarize(latencies, queries, sql, serialize, size_bytes, peak)
+
+
+def http_load(app, paths, token, requests, concurrency):
+    """Requests per second and latency of GET ``paths`` on a local threaded server."""
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def get(i):
+        req = urllib.request.Request(base + paths[i % len(paths)], headers={"Cookie": f"access_token_cookie={token}"})
+        start = time.perf_counter()
+        with urllib.request.urlopen(req) as resp:
+            resp.read()
+        return time.perf_counter() - start
+
+    try:
+        get(0)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(get, range(requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    ms = [s * 1000 for s in latencies]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "requests_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(ms, 50), 3),
+        "p90_ms": round(percentile(ms, 90), 3),
+        "p99_ms": round(percentile(ms, 99), 3),
+    }
+
+
+def bench_size(app, size, iterations, write_iterations, http=None, skip=()):
+    results = {}
+
+    def run(name, call, n, expect):
+        if name not in skip:
+            results[name] = measure(call, n, expect)
+
+    with app.app_context():
+        reset_schema()
+        event_id, admin_id, players = seed_event(size)
+        rounds = math.ceil(math.log2(size)) + 1
+        pending = seed_history(event_id, players, rounds, pending_rounds=1)
+        standings.rebuild(event_id)
+        db.session.commit()
+        rr_event_id, rr_admin_id, _ = seed_event(size, name="Round Robin Benchmark")
+        token = create_access_token(identity=str(admin_id))
+        rr_token = create_access_token(identity=str(rr_admin_id))
+        # first player of each scheduled match wins 2-1
+        pending_scores = {match_id: {} for match_id in pending}
+        for match_id, user_id in (
+            db.session.query(MatchPlayer.match_id, MatchPlayer.user_id)
+            .filter(MatchPlayer.match_id.in_(pending))
+            .order_by(MatchPlayer.mp_id)
+        ):
+            pending_scores[match_id][str(user_id)] = 1 if pending_scores[match_id] else 2
+        pending_scores = list(pending_scores.items())
+
+    client = app.test_client()
+    client.set_cookie("access_token_cookie", token)
+
+    def get_event():
+        with app.app_context():
+            cache.invalidate_event(event_id)
+        return client.get(f"/api/events/{event_id}")
+
+    run("get_event", get_event, iterations, 200)
+    run("get_event_cached", lambda: client.get(f"/api/events/{event_id}"), iterations, 200)
+
+    player = count()
+    run("get_user_matches", lambda: client.get(f"/api/matches/?user_id={players[next(player) % len(players)]}"), iterations, 200)
+
+    to_record = iter(pending_scores)
+
+    def record_result():
+        match_id, scores = next(to_record)
+        return client.post(f"/api/matches/{match_id}/results", json={"scores": scores})
+
+    run("record_results", record_result, min(iterations, len(pending_scores)) - 1, 200)
+    run("generate_swiss_round", lambda: client.post(f"/api/events/{event_id}/generate_swiss_round"), write_iterations, 201)
+
+    rr_client = app.test_client()
+    rr_client.set_cookie("access_token_cookie", rr_token)
+    schedule_size = size * (size - 1) // 2
+    rr_iterations = max(1, min(write_iterations, ROUND_ROBIN_MATCH_BUDGET // schedule_size - 1))
+    run("generate_round_robin", lambda: rr_client.post(f"/api/events/{rr_event_id}/generate_round_robin"), rr_iterations, 201)
+
+    if http:
+        requests, concurrency = http
+        results["http"] = {
+            "get_event_cached": http_load(app, [f"/api/events/{event_id}"], token, requests, concurrency),
+            "get_user_matches": http_load(
+                app, [f"/api/matches/?user_id={pid}" for pid in players], token, requests, concurrency,
+            ),
+        }
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def max_rss_kib():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def compare(report, baseline):
+    for size, endpoints in report["results"].items():
+        for name, now in endpoints.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if name == "http" or not before:
+                continue
+            change = (now["p50_ms"] / before["p50_ms"] - 1) * 100 if before["p50_ms"] else 0.0
+            print(
+                f"players={size} {name}: p50 {before['p50_ms']:.2f} -> {now['p50_ms']:.2f} ms ({change:+.0f}%), "
+                f"queries {before['queries_max']} -> {now['queries_max']}",
+                file=sys.stderr,
+            )
+
+
+def main():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    logging.getLogger("app.sql").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 128, 1024])
+    parser.add_argument("--iterations", type=int, default=30, help="timed calls per read endpoint")
+    parser.add_argument("--write-iterations", type=int, default=5, help="timed calls per generator endpoint")
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--skip", nargs="+", default=[], choices=ENDPOINTS, help="endpoints not to run")
+    parser.add_argument("--output", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", default=None, help="earlier JSON report to compare against")
+    parser.add_argument("--http", action="store_true", help="also load the read endpoints over HTTP")
+    parser.add_argument("--http-requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url, SERVER_TIMING=True, EVENT_STREAM_BACKEND="none")
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "database": app.config["SQLALCHEMY_DATABASE_URI"].split(":", 1)[0],
+            "iterations": args.iterations,
+            "write_iterations": args.write_iterations,
+        },
+        "results": {},
+    }
+    http = (args.http_requests, args.concurrency) if args.http else None
+    for size in args.sizes:
+        start = time.perf_counter()
+        report["results"][str(size)] = bench_size(app, size, args.iterations, args.write_iterations, http, args.skip)
+        print(f"players={size} done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    report["meta"]["max_rss_kib"] = max_rss_kib()
+
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Login throughput and /health latency under a burst of concurrent logins.
+
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --workers 0 4 --clients 16 --logins 256
+
+Starts the app on a local threaded HTTP server once per ``--workers``
+setting (``0`` hashes inline in the request thread, the old behaviour),
+fires ``--logins`` logins from ``--clients`` concurrent clients and probes
+``/health`` while the burst is running.
+"""
+import argparse
+import json
+import logging
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import make_server
+
+from app.extensions import db, password_hasher
+from app.models import User
+from benchmarks.common import make_app, reset_schema
+
+PASSWORD = "benchmark-password"
+
+
+def post_json(url, payload):
+    req = urllib.request.Request(url, data=json.dumps(payload).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def probe_health(url, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        with urllib.request.urlopen(url) as resp:
+            resp.read()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.01)
+
+
+def run_one(workers, clients, logins, rounds, database_url=None):
+    app = make_app(database_url, PASSWORD_HASH_WORKERS=workers, BCRYPT_ROUNDS=rounds)
+    with app.app_context():
+        reset_schema()
+        user = User(name="Bench Login", email="login@bench.local")
+        user.set_password(PASSWORD)
+        db.session.add(user)
+        db.session.commit()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    base = f"http://127.0.0.1:{server.server_port}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    # warm up the worker processes so their start-up is not measured
+    post_json(base + "/api/users/login", {"email": "login@bench.local", "password": PASSWORD})
+
+    stop = threading.Event()
+    health = []
+    prober = threading.Thread(target=probe_health, args=(base + "/health", stop, health))
+    prober.start()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        statuses = list(pool.map(
+            lambda _: post_json(base + "/api/users/login", {"email": "login@bench.local", "password": PASSWORD}),
+            range(logins),
+        ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    prober.join()
+    server.shutdown()
+    stats = password_hasher.stats()
+    password_hasher.shutdown()
+
+    return {
+        "hash_workers": workers,
+        "logins": logins,
+        "ok": statuses.count(200),
+        "busy": statuses.count(503),
+        "logins_per_s": logins / elapsed,
+        "health_p50_ms": statistics.median(health) * 1000 if health else None,
+        "health_max_ms": max(health) * 1000 if health else None,
+        "peak_queue_depth": stats["peak_queue_depth"],
+    }
+
+
+def main():
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=128)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    for workers in args.workers:
+        result = run_one(workers, args.clients, args.logins, args.rounds, args.database_url)
+        print(", ".join(f"{k}={v:.1f}" if isinstance(v, float) else f"{k}={v}" for k, v in result.items()))
+
+
+if __name__ == "__main__":
+    main()
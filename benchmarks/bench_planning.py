@@ -0,0 +1,94 @@
+"""Schedule generation time and memory, without a database.
+
+    python -m benchmarks.bench_planning
+    python -m benchmarks.bench_planning --swiss-sizes 10000 --rounds 14
+    python -m benchmarks.bench_planning --round-robin-sizes 5000 --legs 2
+
+Times the pure ``app.planning`` core the generate endpoints (and their
+``?preview=true`` mode) run on:
+
+* streaming every match out of ``planning.round_robin`` for each round
+  robin size (``--legs 2`` for a double round robin), with the peak
+  memory it allocates;
+* ``planning.swiss_round`` for ``--rounds`` rounds of each Swiss size,
+  playing every round out with random results (45% / 45% / 10% win /
+  loss / draw, 3-1-0 points) before pairing the next. Reports the
+  slowest round and the peak memory of one pairing.
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import date
+
+from app import planning
+from app.pairing import pair_key
+
+POINTS = ((3, 0), (0, 3), (1, 1))
+
+
+def bench_round_robin(size, legs=1):
+    players = list(range(1, size + 1))
+    start = time.perf_counter()
+    matches = sum(1 for _match in planning.round_robin(players, date.today(), legs))
+    elapsed = time.perf_counter() - start
+
+    # memory is traced over a separate pass; tracing slows generation down
+    tracemalloc.start()
+    for _match in planning.round_robin(players, date.today(), legs):
+        pass
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"players": size, "legs": legs, "matches": matches, "round_robin_s": elapsed, "peak_mb": peak / 2**20}
+
+
+def bench_swiss(size, rounds, seed=0):
+    rng = random.Random(seed)
+    players = list(range(1, size + 1))
+    points, played, byes = {}, set(), set()
+    slowest = total = peak = 0
+    for round_num in range(1, rounds + 1):
+        tracemalloc.start()
+        start = time.perf_counter()
+        schedule, bye = planning.swiss_round(players, points, played, byes, round_num, date.today(), seed=round_num)
+        elapsed = time.perf_counter() - start
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        slowest, total = max(slowest, elapsed), total + elapsed
+
+        if bye is not None:
+            byes.add(bye)
+        for _round, _date, p1, p2 in schedule:
+            played.add(pair_key(p1, p2))
+            roll = rng.random()
+            s1, s2 = POINTS[0 if roll < 0.45 else 1 if roll < 0.9 else 2]
+            points[p1] = points.get(p1, 0) + s1
+            points[p2] = points.get(p2, 0) + s2
+    return {
+        "players": size,
+        "rounds": rounds,
+        "swiss_total_s": total,
+        "swiss_slowest_round_s": slowest,
+        "peak_mb": peak / 2**20,
+    }
+
+
+def report(results):
+    print(", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in results.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--round-robin-sizes", type=int, nargs="*", default=[1000, 5000])
+    parser.add_argument("--legs", type=int, choices=(1, 2), default=1)
+    parser.add_argument("--swiss-sizes", type=int, nargs="*", default=[1000, 10000])
+    parser.add_argument("--rounds", type=int, default=10)
+    args = parser.parse_args()
+    for size in args.round_robin_sizes:
+        report(bench_round_robin(size, args.legs))
+    for size in args.swiss_sizes:
+        report(bench_swiss(size, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
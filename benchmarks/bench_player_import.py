@@ -0,0 +1,69 @@
+"""Bulk player import versus one POST /players per email.
+
+    python -m benchmarks.bench_player_import
+    python -m benchmarks.bench_player_import --rows 10000 --legacy 500
+
+Creates ``--rows`` users, then imports them into a fresh event with one
+CSV upload to ``/api/events/<id>/players/import``. ``--legacy N`` also adds
+N players through the single-player endpoint and extrapolates to the
+full row count.
+"""
+import argparse
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from app.models import User
+from benchmarks.common import make_app, reset_schema, seed_event
+
+
+def create_users(count, tag):
+    db.session.execute(db.insert(User), [
+        {"name": f"Import {i}", "email": f"import{i}-{tag}@bench.local", "pw": "!"}
+        for i in range(count)
+    ])
+    db.session.commit()
+    return [f"import{i}-{tag}@bench.local" for i in range(count)]
+
+
+def run(rows, legacy=0, database_url=None):
+    app = make_app(database_url)
+    client = app.test_client()
+    with app.app_context():
+        reset_schema()
+        emails = create_users(rows, time.time_ns())
+        event_id, admin_id, _players = seed_event(0)
+        client.set_cookie("access_token_cookie", create_access_token(identity=str(admin_id)))
+
+    body = "email\n" + "\n".join(emails) + "\n"
+    start = time.perf_counter()
+    resp = client.post(f"/api/events/{event_id}/players/import", data=body, content_type="text/csv")
+    elapsed = time.perf_counter() - start
+    assert resp.status_code == 200, resp.get_json()
+    print(f"bulk: rows={rows}, added={resp.get_json()['added']}, seconds={elapsed:.3f}, rows_per_s={rows / elapsed:.0f}")
+
+    if legacy:
+        with app.app_context():
+            event_id, admin_id, _players = seed_event(0)
+            client.set_cookie("access_token_cookie", create_access_token(identity=str(admin_id)))
+        start = time.perf_counter()
+        for email in emails[:legacy]:
+            resp = client.post(f"/api/events/{event_id}/players", json={"email": email})
+            assert resp.status_code == 201, resp.get_json()
+        elapsed = time.perf_counter() - start
+        print(f"legacy: rows={legacy}, seconds={elapsed:.3f}, rows_per_s={legacy / elapsed:.0f}, "
+              f"estimated_seconds_for_{rows}={elapsed / legacy * rows:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--legacy", type=int, default=0, metavar="N")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+    run(args.rows, args.legacy, args.database_url)
+
+
+if __name__ == "__main__":
+    main()
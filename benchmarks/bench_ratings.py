@@ -0,0 +1,93 @@
+"""Rating recompute time over a synthetic match history.
+
+    python -m benchmarks.bench_ratings
+    python -m benchmarks.bench_ratings --matches 100000 --python
+    python -m benchmarks.bench_ratings --database --matches 200000
+
+Replays ``--matches`` random games among ``--players`` players (45% / 45%
+/ 10% win / loss / tie) with ``ratings.replay``, which uses NumPy when it
+is installed. ``--python`` also times the pure Python loop on the same
+games (slow; keep the match count small). ``--database`` writes the
+matches to a throwaway database first and times the full
+``ratings.recompute`` (load, replay and write).
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+
+from app import ratings
+from app.extensions import db
+from app.models import MatchPlayer
+from app.scheduling import insert_matches
+from benchmarks.common import make_app, reset_schema, seed_event
+
+
+def synthetic_games(players, matches, seed=0):
+    rng = random.Random(seed)
+    first, second, scores = [], [], []
+    for _ in range(matches):
+        a, b = rng.sample(range(players), 2)
+        roll = rng.random()
+        first.append(a)
+        second.append(b)
+        scores.append(1.0 if roll < 0.45 else 0.0 if roll < 0.9 else 0.5)
+    return first, second, scores
+
+
+def write_games(event_id, player_ids, first, second, scores, batch_size=10_000):
+    start = date.today() - timedelta(days=len(first) // batch_size + 1)
+    results = {1.0: ("win", "loss"), 0.0: ("loss", "win"), 0.5: ("tie", "tie")}
+    for offset in range(0, len(first), batch_size):
+        day = start + timedelta(days=offset // batch_size)
+        batch = range(offset, min(offset + batch_size, len(first)))
+        match_ids = insert_matches([
+            {"event_id": event_id, "round": 1, "date": day, "status": "completed"} for _ in batch
+        ])
+        rows = []
+        for match_id, n in zip(match_ids, batch):
+            r1, r2 = results[scores[n]]
+            rows.append({"match_id": match_id, "user_id": player_ids[first[n]], "score": 0, "result": r1})
+            rows.append({"match_id": match_id, "user_id": player_ids[second[n]], "score": 0, "result": r2})
+        db.session.execute(db.insert(MatchPlayer), rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=10_000)
+    parser.add_argument("--matches", type=int, default=1_000_000)
+    parser.add_argument("--python", action="store_true")
+    parser.add_argument("--database", action="store_true")
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    first, second, scores = synthetic_games(args.players, args.matches)
+
+    start = time.perf_counter()
+    levels = max(ratings.levels(first, second, args.players), default=0)
+    print(f"players={args.players}, matches={args.matches}, levels={levels}, levels_s={time.perf_counter() - start:.3f}")
+
+    start = time.perf_counter()
+    ratings.replay(first, second, scores, args.players)
+    engine = "numpy" if ratings.np is not None else "python"
+    print(f"replay ({engine}): {time.perf_counter() - start:.3f}s")
+
+    if args.python:
+        start = time.perf_counter()
+        ratings._replay_python(first, second, scores, args.players, 32, 0.5)
+        print(f"replay (python loop): {time.perf_counter() - start:.3f}s")
+
+    if args.database:
+        app = make_app(args.database_url)
+        with app.app_context():
+            reset_schema()
+            event_id, _admin, player_ids = seed_event(args.players)
+            write_games(event_id, player_ids, first, second, scores)
+            summary = ratings.recompute()
+            db.session.commit()
+            print(", ".join(f"{k}={v}" for k, v in summary.items()))
+
+
+if __name__ == "__main__":
+    main()
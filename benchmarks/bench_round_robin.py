@@ -0,0 +1,61 @@
+"""Insert time for a full round-robin schedule.
+
+    python -m benchmarks.bench_round_robin
+    python -m benchmarks.bench_round_robin --database-url mysql+pymysql://user:pw@localhost/ttt_bench
+    python -m benchmarks.bench_round_robin --sizes 16 64 --legacy
+
+``--legacy`` also times the previous one-flush-per-match insert loop for
+comparison (slow; keep the sizes small).
+"""
+import argparse
+from datetime import date
+
+from app.extensions import db
+from app.models import Match, MatchPlayer
+from app.planning import round_robin, round_robin_matches
+from app.scheduling import bulk_create_matches
+from benchmarks.common import make_app, reset_schema, seed_event, timed
+
+
+def insert_legacy(event_id, schedule):
+    for round_num, match_date, p1, p2 in schedule:
+        match = Match(event_id=event_id, round=round_num, date=match_date, status="scheduled")
+        db.session.add(match)
+        db.session.flush()
+        db.session.add_all([
+            MatchPlayer(match_id=match.match_id, user_id=p1),
+            MatchPlayer(match_id=match.match_id, user_id=p2),
+        ])
+
+
+def run(sizes, database_url=None, legacy=False):
+    app = make_app(database_url)
+    rows = []
+    with app.app_context():
+        reset_schema()
+        for size in sizes:
+            start = date.today()
+            results = {"players": size}
+            paths = [("bulk", bulk_create_matches)] + ([("legacy", insert_legacy)] if legacy else [])
+            for label, insert_fn in paths:
+                event_id, _admin, players = seed_event(size)
+                results["matches"] = round_robin_matches(size)
+                with timed(results, f"{label}_s"):
+                    insert_fn(event_id, round_robin(players, start))
+                    db.session.commit()
+            rows.append(results)
+            print(", ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}" for k, v in results.items()))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[16, 64, 256, 1024])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+    run(args.sizes, args.database_url, args.legacy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Swiss pairing time and rematch count over synthetic tournaments.
+
+    python -m benchmarks.bench_swiss_pairing
+    python -m benchmarks.bench_swiss_pairing --sizes 5000 --rounds 12
+    python -m benchmarks.bench_swiss_pairing --sizes 64 --rounds 63 --legacy
+
+Each round is paired with ``pair_swiss`` and then played out with random
+results (45% / 45% / 10% win / loss / draw, 3-1-0 points). No database is
+involved. ``--legacy`` also runs the previous pop(0) + linear scan pairing
+on the same histories for comparison.
+"""
+import argparse
+import math
+import random
+import time
+
+from app.pairing import pair_key, pair_swiss
+
+
+def legacy_pairing(points, played_pairs, rng):
+    groups = {}
+    for pid, pts in points.items():
+        groups.setdefault(pts, []).append(pid)
+    unpaired = []
+    for pts, group in sorted(groups.items(), key=lambda x: -x[0]):
+        rng.shuffle(group)
+        unpaired.extend(group)
+
+    pairs = []
+    while unpaired:
+        p1 = unpaired.pop(0)
+        if not unpaired:
+            continue
+        p2 = next((c for c in unpaired if pair_key(p1, c) not in played_pairs), unpaired[0])
+        unpaired.remove(p2)
+        pairs.append((p1, p2))
+    return pairs
+
+
+def play_round(pairs, points, rng):
+    for p1, p2 in pairs:
+        roll = rng.random()
+        if roll < 0.45:
+            points[p1] += 3
+        elif roll < 0.9:
+            points[p2] += 3
+        else:
+            points[p1] += 1
+            points[p2] += 1
+
+
+def simulate(size, rounds, seed=0, legacy=False):
+    rng = random.Random(seed)
+    points = {pid: 0 for pid in range(1, size + 1)}
+    played, had_bye = set(), set()
+    stats = {"players": size, "rounds": rounds, "max_s": 0.0, "total_s": 0.0, "rematches": 0}
+    if legacy:
+        stats.update(legacy_max_s=0.0, legacy_total_s=0.0, legacy_rematches=0)
+
+    for _ in range(rounds):
+        if legacy:
+            start = time.perf_counter()
+            legacy_pairs = legacy_pairing(dict(points), played, random.Random(rng.random()))
+            elapsed = time.perf_counter() - start
+            stats["legacy_max_s"] = max(stats["legacy_max_s"], elapsed)
+            stats["legacy_total_s"] += elapsed
+            stats["legacy_rematches"] += sum(pair_key(*p) in played for p in legacy_pairs)
+
+        start = time.perf_counter()
+        pairs, bye = pair_swiss(points, played, had_bye, rng=rng)
+        elapsed = time.perf_counter() - start
+        stats["max_s"] = max(stats["max_s"], elapsed)
+        stats["total_s"] += elapsed
+        stats["rematches"] += sum(pair_key(*p) in played for p in pairs)
+
+        played.update(pair_key(*p) for p in pairs)
+        play_round(pairs, points, rng)
+        if bye is not None:
+            had_bye.add(bye)
+            points[bye] += 3
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 512, 5000, 5001])
+    parser.add_argument("--rounds", type=int, default=None, help="default: ceil(log2(players)) + 2")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--legacy", action="store_true")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rounds = args.rounds or math.ceil(math.log2(size)) + 2
+        stats = simulate(size, min(rounds, size - 1), args.seed, args.legacy)
+        print(", ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items()))
+
+
+if __name__ == "__main__":
+    main()
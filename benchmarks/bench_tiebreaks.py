@@ -0,0 +1,85 @@
+"""Tiebreaker time for large Swiss events.
+
+    python -m benchmarks.bench_tiebreaks
+    python -m benchmarks.bench_tiebreaks --sizes 500 2000 --naive
+    python -m benchmarks.bench_tiebreaks --database-url mysql+pymysql://user:pw@localhost/ttt_bench
+
+Seeds an event with ceil(log2(players)) + 1 completed random rounds and
+times, with every tiebreaker in the chain:
+
+* building the ``OpponentIndex`` and computing the chain from an
+  already loaded history;
+* ``standings.rerank`` with and without tiebreakers (loads the matches
+  of players sharing a record itself, so this includes the extra query);
+* ``standings.leaderboard`` with tiebreakers (reads the stored values).
+
+``--naive`` also times the per-player approach that rescans every match
+for each player and each opponent (slow; O(players x matches)).
+"""
+import argparse
+import math
+
+from app import standings, tiebreaks
+from app.extensions import db
+from benchmarks.common import make_app, reset_schema, seed_event, seed_history, timed
+
+CHAIN = ("buchholz", "sonneborn_berger", "owp")
+
+
+def naive_buchholz(matches, user_id):
+    def points(uid):
+        return sum(
+            standings.RESULT_POINTS.get(result, 0)
+            for players in matches for pid, _score, result in players if pid == uid
+        )
+
+    total = 0
+    for players in matches:
+        ids = [pid for pid, _score, _result in players]
+        if user_id in ids and len(ids) == 2:
+            total += points(ids[1] if ids[0] == user_id else ids[0])
+    return total
+
+
+def run(sizes, database_url=None, naive=False):
+    app = make_app(database_url, LEADERBOARD_TIEBREAKS=",".join(CHAIN))
+    with app.app_context():
+        reset_schema()
+        for size in sizes:
+            results = {"players": size}
+            event_id, _admin, players = seed_event(size)
+            seed_history(event_id, players, math.ceil(math.log2(size)) + 1)
+            standings.rebuild(event_id)
+            db.session.commit()
+
+            history = standings.load_history(event_id)
+            results["matches"] = len(history.matches)
+            with timed(results, "chain_s"):
+                tiebreaks.compute(tiebreaks.OpponentIndex(history, standings.RESULT_POINTS["win"]), CHAIN)
+            with timed(results, "rerank_s"):
+                standings.rerank(event_id)
+            app.config["LEADERBOARD_TIEBREAKS"] = ()
+            with timed(results, "rerank_no_tiebreaks_s"):
+                standings.rerank(event_id)
+            app.config["LEADERBOARD_TIEBREAKS"] = CHAIN
+            db.session.rollback()
+            with timed(results, "leaderboard_s"):
+                standings.leaderboard(event_id)
+            if naive:
+                with timed(results, "naive_buchholz_s"):
+                    for uid in players:
+                        naive_buchholz(history.matches, uid)
+            print(", ".join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in results.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[128, 512, 2000])
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--naive", action="store_true")
+    args = parser.parse_args()
+    run(args.sizes, args.database_url, args.naive)
+
+
+if __name__ == "__main__":
+    main()
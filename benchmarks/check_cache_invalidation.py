@@ -0,0 +1,84 @@
+"""Check that writes make cached and ETagged reads go stale.
+
+    python -m benchmarks.check_cache_invalidation
+    python -m benchmarks.check_cache_invalidation --database-url mysql+pymysql://user:pw@localhost/ttt_bench
+
+Seeds a small event with a round robin, warms the response cache and
+the ETag of each read in ``READS``, then makes each write in ``WRITES``
+through the API as the user it concerns. After every write the reads are repeated with
+``If-None-Match``: each has to come back 200 with a new ETag and show the
+change, not a 304 or the cached payload. Exits non-zero otherwise.
+"""
+import argparse
+import sys
+
+from flask_jwt_extended import create_access_token
+
+from app.extensions import db
+from benchmarks.common import make_app, reset_schema, seed_event
+
+READS = {
+    "get_event": "/api/events/{event_id}",
+    "get_event_matches": "/api/events/{event_id}/matches",
+}
+
+
+def rename_player(client, event_id, player_id):
+    """A player renames themselves; their name is embedded in event payloads."""
+    response = client.post(f"/api/users/{player_id}", json={"name": "Renamed Player"})
+    return response, "Renamed Player"
+
+
+# (write, function taking (client, event_id, player_id) -> (response, text the reads must show))
+WRITES = (
+    ("rename player", rename_player),
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    failures = []
+    with app.app_context():
+        reset_schema()
+        event_id, admin_id, players = seed_event(4)
+        admin_token = create_access_token(identity=str(admin_id))
+        player_token = create_access_token(identity=str(players[0]))
+        db.session.commit()
+
+    admin = app.test_client()
+    admin.set_cookie("access_token_cookie", admin_token)
+    player = app.test_client()
+    player.set_cookie("access_token_cookie", player_token)
+
+    admin.post(f"/api/events/{event_id}/generate_round_robin")
+    etags = {}
+    for name, url in READS.items():
+        response = admin.get(url.format(event_id=event_id))
+        etags[name] = response.headers.get("ETag")
+        if response.status_code != 200 or not etags[name]:
+            failures.append(f"{name}: HTTP {response.status_code}, ETag {etags[name]!r}")
+
+    for write, make_write in WRITES:
+        response, expected = make_write(player, event_id, players[0])
+        if response.status_code >= 400:
+            failures.append(f"{write}: HTTP {response.status_code} {response.get_json()}")
+            continue
+        for name, url in READS.items():
+            read = admin.get(url.format(event_id=event_id), headers={"If-None-Match": etags[name]})
+            ok = read.status_code == 200 and expected in read.get_data(as_text=True)
+            print(f"{'ok' if ok else 'FAIL':4} {write} -> {name}: HTTP {read.status_code}")
+            if not ok:
+                failures.append(f"{write} left {name} stale (HTTP {read.status_code})")
+            etags[name] = read.headers.get("ETag", etags[name])
+
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
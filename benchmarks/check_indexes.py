@@ -0,0 +1,100 @@
+"""Check that the hot lookups are planned on their indexes.
+
+    python -m benchmarks.check_indexes
+    python -m benchmarks.check_indexes --database-url mysql+pymysql://user:pw@localhost/ttt_bench
+
+Seeds an event with a few rounds of history, then asks the database to
+EXPLAIN each lookup in ``LOOKUPS`` (the admin and membership checks,
+match players by match and by user, the next round number and the
+leaderboard) and exits non-zero if any of them isn't using the index it
+is listed with. Supports SQLite (``EXPLAIN QUERY PLAN``) and MySQL
+(``EXPLAIN``).
+"""
+import argparse
+import sys
+
+from sqlalchemy import text
+
+from app import standings
+from app.extensions import db
+from benchmarks.common import make_app, reset_schema, seed_event, seed_history
+
+# (lookup, SQL, index it should use)
+LOOKUPS = (
+    (
+        "admin check",
+        "SELECT eo_id FROM event_roles WHERE event_id = :event_id AND user_id = :user_id AND role = 'admin'",
+        "uq_event_roles_event_id_user_id_role",
+    ),
+    (
+        "event membership",
+        "SELECT ep_id FROM event_players WHERE event_id = :event_id AND user_id = :user_id",
+        "uq_event_players_event_id_user_id",
+    ),
+    (
+        "players of a match",
+        "SELECT user_id, score, result FROM match_players WHERE match_id = :match_id",
+        "ix_match_players_match_id",
+    ),
+    (
+        "matches of a user",
+        "SELECT match_id FROM match_players WHERE user_id = :user_id",
+        "ix_match_players_user_id",
+    ),
+    (
+        "next round number",
+        "SELECT max(round) FROM matches WHERE event_id = :event_id",
+        "ix_matches_event_id_round",
+    ),
+    (
+        "leaderboard",
+        "SELECT user_id, rank FROM standings WHERE event_id = :event_id ORDER BY rank",
+        "ix_standings_event_id_rank",
+    ),
+)
+
+
+def explain(sql, params):
+    """The index names in the database's plan for ``sql``."""
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite":
+        plan = db.session.execute(text("EXPLAIN QUERY PLAN " + sql), params).all()
+        return {word for row in plan for word in row[-1].split()}
+    if dialect == "mysql":
+        plan = db.session.execute(text("EXPLAIN " + sql), params).mappings().all()
+        return {row["key"] for row in plan if row["key"]}
+    raise SystemExit(f"EXPLAIN output of {dialect} isn't supported")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, default=64)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    app = make_app(args.database_url)
+    failures = []
+    with app.app_context():
+        reset_schema()
+        event_id, admin_id, players = seed_event(args.players)
+        seed_history(event_id, players, 6)
+        standings.rebuild(event_id)
+        db.session.commit()
+        match_id = db.session.execute(
+            text("SELECT min(match_id) FROM matches WHERE event_id = :event_id"), {"event_id": event_id}
+        ).scalar()
+        params = {"event_id": event_id, "user_id": admin_id, "match_id": match_id}
+
+        for lookup, sql, index in LOOKUPS:
+            used = explain(sql, params)
+            ok = index in used
+            print(f"{'ok' if ok else 'FAIL':4} {lookup}: {index}")
+            if not ok:
+                failures.append(f"{lookup} doesn't use {index}: {sql}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
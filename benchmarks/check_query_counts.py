@@ -0,0 +1,102 @@
+"""Check that event reads cost the same number of queries at any event size.
+
+    python -m benchmarks.check_query_counts
+    python -m benchmarks.check_query_counts --sizes 8 64 256
+    python -m benchmarks.check_query_counts --database-url mysql+pymysql://user:pw@localhost/ttt_bench
+
+For each size an event is seeded with a full round robin of completed
+matches (a 64-player event has 2,016), then ``GET /api/events/<id>``
+(with its response cache emptied) and ``GET /api/events/<id>/matches``
+are called once and their SQL statements counted. Exits non-zero if an
+endpoint's count differs between sizes or exceeds ``--max-queries``,
+i.e. if it is back to loading players or matches one at a time.
+"""
+import argparse
+import sys
+from datetime import date
+from itertools import combinations
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import standings
+from app.extensions import cache, db
+from app.models import MatchPlayer
+from app.scheduling import insert_matches
+from benchmarks.common import make_app, reset_schema, seed_event
+
+ENDPOINTS = {
+    "get_event": "/api/events/{event_id}",
+    "get_event_matches": "/api/events/{event_id}/matches",
+}
+
+
+def seed_round_robin(event_id, players):
+    """Every pairing of ``players`` as one completed match, the first player winning 2-1."""
+    pairs = list(combinations(players, 2))
+    match_ids = insert_matches([
+        {"event_id": event_id, "round": 1, "date": date.today(), "status": "completed"}
+        for _ in pairs
+    ])
+    db.session.execute(db.insert(MatchPlayer), [
+        row
+        for match_id, (p1, p2) in zip(match_ids, pairs)
+        for row in (
+            {"match_id": match_id, "user_id": p1, "score": 2, "result": "win"},
+            {"match_id": match_id, "user_id": p2, "score": 1, "result": "loss"},
+        )
+    ])
+    standings.rebuild(event_id)
+    db.session.commit()
+    return len(pairs)
+
+
+def count_queries(app, sizes):
+    """``{endpoint: {size: queries}}`` for every endpoint and size."""
+    counts = {name: {} for name in ENDPOINTS}
+    with app.app_context():
+        reset_schema()
+        engine = db.engine
+        for size in sizes:
+            event_id, admin_id, players = seed_event(size)
+            matches = seed_round_robin(event_id, players)
+            cache.invalidate_event(event_id)
+            client = app.test_client()
+            client.set_cookie("access_token_cookie", create_access_token(identity=str(admin_id)))
+
+            for name, url in ENDPOINTS.items():
+                statements = []
+                counter = lambda *args: statements.append(1)
+                event.listen(engine, "before_cursor_execute", counter)
+                response = client.get(url.format(event_id=event_id))
+                event.remove(engine, "before_cursor_execute", counter)
+                if response.status_code != 200:
+                    raise SystemExit(f"{name}: HTTP {response.status_code} at {size} players")
+                counts[name][size] = len(statements)
+            print(f"players={size}, matches={matches}, " + ", ".join(
+                f"{name}={counts[name][size]}" for name in ENDPOINTS
+            ))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--max-queries", type=int, default=10)
+    parser.add_argument("--database-url", default=None)
+    args = parser.parse_args()
+
+    counts = count_queries(make_app(args.database_url), args.sizes)
+    failures = []
+    for name, by_size in counts.items():
+        if len(set(by_size.values())) > 1:
+            failures.append(f"{name}: query count grows with event size {by_size}")
+        if max(by_size.values()) > args.max_queries:
+            failures.append(f"{name}: {max(by_size.values())} queries, more than {args.max_queries}")
+    for failure in failures:
+        print(failure, file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
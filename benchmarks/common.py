@@ -0,0 +1,122 @@
+"""Shared setup for the benchmark scripts.
+
+Benchmarks build a throwaway app against ``--database-url`` (a temporary
+SQLite file by default) and create the schema directly from the models.
+"""
+import os
+import random
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+from app.models import Event, EventPlayer, EventRole, MatchPlayer, User
+from app.scheduling import insert_matches
+
+
+def temp_sqlite_url():
+    return "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="ttt-bench-"), "bench.db")
+
+
+def make_app(database_url=None, **overrides):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url or temp_sqlite_url()
+        RATELIMIT_ENABLED = False
+        PASSWORD_HASH_WORKERS = 0
+
+    for key, value in overrides.items():
+        setattr(BenchConfig, key, value)
+    return create_app(BenchConfig)
+
+
+def reset_schema():
+    db.drop_all()
+    db.create_all()
+
+
+def seed_event(num_players, name="Benchmark Event"):
+    """Create an event with an admin and ``num_players`` registered players.
+
+    Passwords are stored as placeholders; benchmarks never log in with them.
+    Returns ``(event_id, admin_id, player_ids)``.
+    """
+    admin = User(name="Bench Admin", email=f"admin-{time.time_ns()}@bench.local", pw="!")
+    ev = Event(name=name, start_date=date.today())
+    db.session.add_all([admin, ev])
+    db.session.flush()
+
+    player_ids = []
+    if num_players:
+        tag = time.time_ns()
+        db.session.execute(db.insert(User), [
+            {"name": f"Player {i}", "email": f"p{i}-{tag}@bench.local", "pw": "!"}
+            for i in range(num_players)
+        ])
+        player_ids = [
+            uid for (uid,) in db.session.query(User.user_id)
+            .filter(User.email.like(f"%-{tag}@bench.local"))
+            .order_by(User.user_id)
+        ]
+        db.session.execute(db.insert(EventPlayer), [
+            {"event_id": ev.event_id, "user_id": uid} for uid in player_ids
+        ])
+    db.session.execute(db.insert(EventRole), [
+        {"event_id": ev.event_id, "user_id": uid, "role": "player"} for uid in player_ids
+    ] + [{"event_id": ev.event_id, "user_id": admin.user_id, "role": "admin"}])
+    db.session.commit()
+    return ev.event_id, admin.user_id, player_ids
+
+
+def seed_history(event_id, player_ids, rounds, pending_rounds=0, seed=0):
+    """Play ``rounds`` randomly paired rounds, then schedule ``pending_rounds`` more.
+
+    Completed matches get random scores (45% / 45% / 10% win / loss / tie).
+    Standings are not touched; call ``standings.rebuild`` afterwards.
+    Returns the match_ids of the scheduled (pending) matches.
+    """
+    rng = random.Random(seed)
+    start = date.today() - timedelta(weeks=rounds)
+    pending = []
+    for round_num in range(1, rounds + pending_rounds + 1):
+        completed = round_num <= rounds
+        players = list(player_ids)
+        rng.shuffle(players)
+        pairs = list(zip(players[::2], players[1::2]))
+        if not pairs:
+            continue
+        match_ids = insert_matches([
+            {
+                "event_id": event_id,
+                "round": round_num,
+                "date": start + timedelta(weeks=round_num - 1),
+                "status": "completed" if completed else "scheduled",
+            }
+            for _ in pairs
+        ])
+        rows = []
+        for match_id, (p1, p2) in zip(match_ids, pairs):
+            if not completed:
+                rows += [{"match_id": match_id, "user_id": p} for p in (p1, p2)]
+                continue
+            roll = rng.random()
+            s1, s2 = (2, 0) if roll < 0.45 else (0, 2) if roll < 0.9 else (1, 1)
+            r1, r2 = ("win", "loss") if s1 > s2 else ("loss", "win") if s2 > s1 else ("tie", "tie")
+            rows += [
+                {"match_id": match_id, "user_id": p1, "score": s1, "result": r1},
+                {"match_id": match_id, "user_id": p2, "score": s2, "result": r2},
+            ]
+        db.session.execute(db.insert(MatchPlayer), rows)
+        if not completed:
+            pending += match_ids
+    db.session.commit()
+    return pending
+
+
+@contextmanager
+def timed(results, key):
+    start = time.perf_counter()
+    yield
+    results[key] = time.perf_counter() - start
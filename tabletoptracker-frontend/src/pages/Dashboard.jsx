@@ -20,21 +20,15 @@ function Dashboard() {
         const eventsRes = await API.get("/api/events");
         setEvents(eventsRes.data);
 
-        // Get user's matches
-        const matchesRes = await API.get(`/api/matches?user_id=${profileRes.data.user_id}`);
-        const allMatches = matchesRes.data;
+        // Get the first page of user's upcoming (soonest first) and past (newest first) matches
+        const userId = profileRes.data.user_id;
+        const [upcomingRes, pastRes] = await Promise.all([
+          API.get("/api/matches", { params: { user_id: userId, status: "scheduled", order: "asc" } }),
+          API.get("/api/matches", { params: { user_id: userId, status: "completed", order: "desc" } }),
+        ]);
 
-        // Split into upcoming and past matches, sorted by date
-        const upcoming = allMatches
-          .filter((m) => m.status === "scheduled")
-          .sort((a, b) => new Date(a.date) - new Date(b.date));
-
-        const past = allMatches
-          .filter((m) => m.status === "completed")
-          .sort((a, b) => new Date(b.date) - new Date(a.date));
-
-        setUpcomingMatches(upcoming);
-        setPastMatches(past);
+        setUpcomingMatches(upcomingRes.data.matches);
+        setPastMatches(pastRes.data.matches);
       } catch (err) {
         console.error(err);
         setError(err.response?.data?.msg || "Failed to load dashboard");
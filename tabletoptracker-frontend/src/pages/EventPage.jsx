@@ -31,6 +31,69 @@ function EventPage() {
     fetchEvent();
   }, [eventId]);
 
+  // live updates: apply small deltas instead of re-fetching the whole event
+  useEffect(() => {
+    const source = new EventSource(`${API.defaults.baseURL}/api/events/${eventId}/stream`, {
+      withCredentials: true,
+    });
+    let version = null;
+
+    const refetch = async () => {
+      try {
+        const res = await API.get(`/api/events/${eventId}`);
+        setEvent(res.data);
+      } catch (err) {
+        console.error(err);
+      }
+    };
+
+    const listen = (kind, apply) => {
+      source.addEventListener(kind, (e) => {
+        const data = JSON.parse(e.data);
+        if (data.version !== undefined) version = data.version;
+        apply(data);
+      });
+    };
+
+    source.addEventListener("hello", (e) => {
+      const current = JSON.parse(e.data).version;
+      // reconnected after missing some updates
+      if (version !== null && version !== current) refetch();
+      version = current;
+    });
+
+    listen("matches", (data) => {
+      setEvent((prev) => {
+        if (!prev) return prev;
+        const byId = new Map(prev.matches.map((m) => [m.match_id, m]));
+        data.matches.forEach((m) => byId.set(m.match_id, m));
+        return { ...prev, matches: [...byId.values()].sort((a, b) => a.match_id - b.match_id) };
+      });
+    });
+
+    listen("match_deleted", (data) => {
+      setEvent((prev) =>
+        prev && { ...prev, matches: prev.matches.filter((m) => m.match_id !== data.match_id) }
+      );
+    });
+
+    listen("standings", (data) => {
+      setEvent((prev) => {
+        if (!prev) return prev;
+        const changed = new Map(data.rows.map((r) => [r.user_id, r]));
+        const leaderboard = prev.leaderboard
+          .map((p) => (changed.has(p.user_id) ? { ...p, ...changed.get(p.user_id) } : p))
+          .sort((a, b) => a.rank - b.rank || a.name.toLowerCase().localeCompare(b.name.toLowerCase()));
+        return { ...prev, leaderboard };
+      });
+    });
+
+    listen("refresh", refetch);
+    listen("resync", refetch);
+
+    return () => source.close();
+  }, [eventId]);
+
   const handleDeleteMatch = async (matchId) => {
     if (!window.confirm("Are you sure you want to delete this match?")) return;
     try {
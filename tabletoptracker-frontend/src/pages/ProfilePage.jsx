@@ -21,21 +21,15 @@ function ProfilePage() {
       const eventsRes = await API.get("/api/events");
       setEvents(eventsRes.data);
 
-      // get this user's matches
-      const matchesRes = await API.get(`/api/matches?user_id=${profileRes.data.user_id}`);
-      const allMatches = matchesRes.data;
+      // get the first page of this user's upcoming vs past matches
+      const userId = profileRes.data.user_id;
+      const [upcomingRes, pastRes] = await Promise.all([
+        API.get("/api/matches", { params: { user_id: userId, status: "scheduled", order: "asc" } }),
+        API.get("/api/matches", { params: { user_id: userId, status: "completed", order: "desc" } }),
+      ]);
 
-      // split upcoming vs past
-      const upcoming = allMatches
-        .filter((m) => m.status === "scheduled")
-        .sort((a, b) => new Date(a.date) - new Date(b.date));
-
-      const past = allMatches
-        .filter((m) => m.status === "completed")
-        .sort((a, b) => new Date(b.date) - new Date(a.date));
-
-      setUpcomingMatches(upcoming);
-      setPastMatches(past);
+      setUpcomingMatches(upcomingRes.data.matches);
+      setPastMatches(pastRes.data.matches);
     } catch (err) {
       console.error(err);
       setError(err.response?.data?.msg || "Failed to load profile");